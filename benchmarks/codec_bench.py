@@ -0,0 +1,113 @@
+"""CPU spent on json per update, stdlib calls vs service.codec.
+
+Run: python -m benchmarks.codec_bench
+"""
+
+import json
+import timeit
+from dataclasses import asdict
+
+from service import codec
+from service.vk_api.dataclasses import (
+    Update,
+    UpdateMessage,
+    UpdateObject,
+)
+
+UPDATES_IN_RESPONSE = 20
+NUMBER = 2000
+
+
+def make_response() -> bytes:
+    update = {
+        "type": "message_new",
+        "event_id": "0b4a3c5d6e7f",
+        "object": {
+            "message": {
+                "id": 123,
+                "from_id": 1234567,
+                "peer_id": 2000000001,
+                "text": "Ответ на вопрос викторины",
+                "payload": '{"btn": "ready", "game_id": 1}',
+            },
+        },
+    }
+    return json.dumps(
+        {"ts": "100", "updates": [update] * UPDATES_IN_RESPONSE}
+    ).encode()
+
+
+def make_update() -> Update:
+    return Update(
+        type="message_new",
+        object=UpdateObject(
+            message=UpdateMessage(
+                id=123,
+                from_id=1234567,
+                peer_id=2000000001,
+                text="Ответ на вопрос викторины",
+                payload='{"btn": "ready", "game_id": 1}',
+            )
+        ),
+    )
+
+
+KEYBOARD = {
+    "one_time": False,
+    "inline": False,
+    "buttons": [
+        [
+            {
+                "action": {
+                    "type": "callback",
+                    "payload": '{"btn": "choose_price", "price": 100}',
+                    "label": f"Кнопка {i}",
+                },
+                "color": "primary",
+            }
+            for i in range(2)
+        ]
+    ]
+    * 3,
+}
+
+
+def stdlib_path(response: bytes, update: Update) -> None:
+    json.loads(response.decode())
+    for _ in range(UPDATES_IN_RESPONSE):
+        body = json.dumps(asdict(update)).encode()
+        json.loads(body.decode("utf-8"))
+        json.dumps(KEYBOARD)
+
+
+def codec_path(response: bytes, update: Update) -> None:
+    codec.loads(response)
+    for _ in range(UPDATES_IN_RESPONSE):
+        body = codec.dumps(update)
+        codec.loads(body)
+        codec.dumps_str(KEYBOARD)
+
+
+def main() -> None:
+    response = make_response()
+    update = make_update()
+    per_update = NUMBER * UPDATES_IN_RESPONSE
+    results = {}
+    for name, func in (("stdlib json", stdlib_path), ("codec", codec_path)):
+        seconds = min(
+            timeit.repeat(
+                lambda func=func: func(response, update),
+                number=NUMBER,
+                repeat=5,
+            )
+        )
+        results[name] = seconds / per_update * 1e6
+    print(f"codec backend: {codec.BACKEND}")  # noqa: T201
+    for name, micro in results.items():
+        print(f"{name:12} {micro:8.2f} µs per update")  # noqa: T201
+    saved = results["stdlib json"] - results["codec"]
+    print(f"{'saved':12} {saved:8.2f} µs per update")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Cost of one update on its way from long-poll to the bot manager:
+raw json -> typed update -> queue message -> typed update again.
+
+Run: python -m benchmarks.update_bench
+"""
+
+import gc
+import json
+import sys
+import timeit
+import tracemalloc
+
+from service import codec
+from service.rabbitmq_service import envelope
+from service.vk_api.dataclasses import Update, parse_update
+
+UPDATES_IN_RESPONSE = 20
+NUMBER = 500
+RETAINED = 1000
+
+MESSAGE_NEW = {
+    "type": "message_new",
+    "event_id": "0b4a3c5d6e7f",
+    "group_id": 1,
+    "object": {
+        "message": {
+            "id": 123,
+            "from_id": 1234567,
+            "peer_id": 2000000001,
+            "text": "Ответ на вопрос викторины",
+            "payload": '{"btn": "ready", "game_id": 1}',
+            "date": 1700000000,
+            "conversation_message_id": 10,
+            "fwd_messages": [],
+            "attachments": [],
+        },
+        "client_info": {"button_actions": ["text"], "keyboard": True},
+    },
+}
+MESSAGE_EVENT = {
+    "type": "message_event",
+    "event_id": "1c5b",
+    "group_id": 1,
+    "object": {
+        "user_id": 1234567,
+        "peer_id": 2000000001,
+        "event_id": "e7f0a1",
+        "payload": {"btn": "choose_price", "price": 100},
+        "conversation_message_id": 11,
+    },
+}
+
+
+def make_response() -> bytes:
+    updates = [MESSAGE_NEW, MESSAGE_EVENT] * (UPDATES_IN_RESPONSE // 2)
+    return json.dumps({"ts": "100", "updates": updates}).encode()
+
+
+def pipeline(response: bytes) -> list:
+    typed = []
+    for update in codec.loads(response)["updates"]:
+        message = envelope.encode(Update.from_vk(update, update["group_id"]))
+        typed.append(envelope.decode(message))
+    return typed
+
+
+def main() -> None:
+    response = make_response()
+    seconds = min(
+        timeit.repeat(lambda: pipeline(response), number=NUMBER, repeat=5)
+    )
+    micro = seconds / (NUMBER * UPDATES_IN_RESPONSE) * 1e6
+
+    messages = [
+        codec.loads(codec.dumps(update)) for update in pipeline(response)
+    ]
+    messages *= RETAINED // UPDATES_IN_RESPONSE
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    kept = [parse_update(message) for message in messages]
+    size, _ = tracemalloc.get_traced_memory()
+    blocks = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+    gc.enable()
+
+    tracemalloc.start()
+    pipeline(response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sizes = {
+        version: sum(
+            len(envelope.encode(update, version).body)
+            for update in pipeline(response)
+        )
+        / UPDATES_IN_RESPONSE
+        for version in (1, envelope.SCHEMA_VERSION)
+    }
+
+    print(f"codec backend: {codec.BACKEND}")  # noqa: T201
+    print(f"msgpack: {bool(envelope.msgpack)}")  # noqa: T201
+    print(f"{'pipeline':14} {micro:8.2f} µs per update")  # noqa: T201
+    print(  # noqa: T201
+        f"{'typed update':14} {size / len(kept):8.0f} bytes, "
+        f"{blocks / len(kept):.1f} allocated blocks"
+    )
+    print(  # noqa: T201
+        f"{'batch peak':14} {peak / 1024:8.1f} KiB "
+        f"per {UPDATES_IN_RESPONSE} updates"
+    )
+    for version, size in sizes.items():
+        print(  # noqa: T201
+            f"{f'message v{version}':14} {size:8.0f} bytes per update"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""game group
+
+Revision ID: 3f7a9d2c4b18
+Revises: 8c4f2a61e9d3
+Create Date: 2026-10-18 16:20:04.118273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from service.config import get_config
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7a9d2c4b18'
+down_revision: Union[str, None] = '8c4f2a61e9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('game', sa.Column('group_id', sa.BigInteger(), nullable=True))
+    # games so far were played in the main community
+    op.execute(
+        sa.text('UPDATE game SET group_id = :group_id').bindparams(
+            group_id=get_config().bot.group_id
+        )
+    )
+    op.alter_column('game', 'group_id', nullable=False)
+    op.create_index(
+        'ix_game_group_id_chat_id', 'game', ['group_id', 'chat_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_game_group_id_chat_id', table_name='game')
+    op.drop_column('game', 'group_id')
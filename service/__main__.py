@@ -7,7 +7,9 @@ from fastapi.openapi.utils import get_openapi
 
 from service.config import Storage, get_config, logger
 from service.db_setup.db_connector import DbConnector
+from service.endpoints.callback_handlers import api_router as callback_routes
 from service.endpoints.data_handlers import api_router as data_routes
+from service.endpoints.metrics_handlers import api_router as metrics_routes
 from service.endpoints.put_handlers import api_router as put_routes
 from service.endpoints.update_handlers import api_router as upd_routes
 
@@ -36,8 +38,10 @@ async def lifespan(app: FastAPI):
     await app.db.connect()
     await app.storage.que.connect()
     await app.storage.vk_api.connect()
+    app.storage.dispatcher.start()
     # task = asyncio.create_task(bgtask.long_running_task())
     yield
+    await app.storage.dispatcher.stop()
     await app.storage.vk_api.disconnect()
     await app.storage.que.disconnect()
     await app.db.disconnect()
@@ -87,6 +91,8 @@ def custom_openapi():
 app.include_router(put_routes)
 app.include_router(upd_routes)
 app.include_router(data_routes)
+app.include_router(callback_routes)
+app.include_router(metrics_routes)
 app.openapi = custom_openapi
 app.config = get_config()
 app.storage = Storage(app)
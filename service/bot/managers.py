@@ -18,6 +18,8 @@ from service.game.managers import GameManager
 from service.game.schemes import UserFoundSchema
 from service.vk_api.btn_creator import BtnCreator
 from service.vk_api.dataclasses import BtnData, ChatInvite, Message, Update
+from service.vk_api.groups import current_group_id
+from service.vk_api.rate_limiter import Priority
 
 if typing.TYPE_CHECKING:
     from fastapi import FastAPI
@@ -71,7 +73,7 @@ class CatGameEventsBotManager:
             + "Введите ответ текстом."
         )
         new_message = self.bot_manager.get_message(text, chat_id)
-        await self.app.storage.vk_api.send_message(new_message, keyboard=[])
+        await self.app.storage.dispatcher.send_message(new_message, keyboard=[])
 
     async def parse_cat_params(self, message: Update, params: CatRoundParams):
         for attr in ("from_id", "round_id", "question_id"):
@@ -146,7 +148,7 @@ class CatGameEventsBotManager:
         )
         keyboard = self.get_cat_keyboard(game_id, chat_members, params)
         new_message = self.bot_manager.get_message(text, chat_id)
-        await self.app.storage.vk_api.send_message(
+        await self.app.storage.dispatcher.send_message(
             new_message, keyboard=keyboard
         )
 
@@ -230,7 +232,7 @@ class GamePreparationBotManager:
             )
         keyboard = BtnCreator().get_not_inline_callback_keyboard(lst_of_btns)
         new_message = self.bot_manager.get_message(text, chat_id)
-        await self.app.storage.vk_api.send_message(
+        await self.app.storage.dispatcher.send_message(
             new_message, keyboard=keyboard
         )
 
@@ -274,7 +276,7 @@ class GamePreparationBotManager:
         game_id = await self.game_manager.get_game(chat_id)
         if not game_id:
             return
-        add_user = await self.app.storage.vk_api.get_user_info(member_id)
+        add_user = await self.app.storage.user_directory.get(member_id)
         await self.create_users_and_participants(game_id, [add_user])
 
     async def prepare_to_repeat_game(self, message: Update, short=False):
@@ -315,10 +317,7 @@ class GameRoundBotManager:
         player_vk_id: int | None = None,
     ) -> UserDto:
         if round_result and round_result.round_score > 0:
-            user = await self.app.storage.user.get_user(
-                id_=None, vk_id=player_vk_id
-            )
-            return UserDto(**user)
+            return await self.app.storage.user_directory.get(player_vk_id)
 
         users = await self.app.storage.game.get_random_participants(
             game_id, limit=2
@@ -383,7 +382,7 @@ class GameRoundBotManager:
             "Выберите категорию."
         )
         new_message = self.bot_manager.get_message(text, chat_id)
-        await self.app.storage.vk_api.send_message(
+        await self.app.storage.dispatcher.send_message(
             new_message, keyboard=keyboard
         )
 
@@ -427,7 +426,7 @@ class GameRoundBotManager:
             self.logger.error("no user in status")
             await self.bot_manager.reaction_on_wrong_text("something wrong")
             return
-        user = await self.app.storage.vk_api.get_user_info(status.waiting_user)
+        user = await self.app.storage.user_directory.get(status.waiting_user)
 
         text = (
             f"Выбрана категория: {CATEGORY_NAMES[category]}.\n"
@@ -436,7 +435,7 @@ class GameRoundBotManager:
         )
 
         new_message = self.bot_manager.get_message(text, chat_id)
-        await self.app.storage.vk_api.send_message(
+        await self.app.storage.dispatcher.send_message(
             new_message, keyboard=keyboard
         )
         await self.app.storage.game.change_game_status(
@@ -473,8 +472,8 @@ class GameRoundBotManager:
         new_message = self.bot_manager.get_message(
             text, message.object.message.peer_id
         )
-        await self.app.storage.vk_api.send_message(
-            new_message, keyboard=keyboard
+        await self.app.storage.dispatcher.send_message(
+            new_message, keyboard=keyboard, priority=Priority.high
         )
 
     async def time_limit_answering_msg(
@@ -490,7 +489,7 @@ class GameRoundBotManager:
         answer, user_vk_id = data_status
 
         score = answer.score
-        user = await self.app.storage.user.get_user(id_=None, vk_id=user_vk_id)
+        user = await self.app.storage.user_directory.get(user_vk_id)
         user_mention = self.bot_manager.get_user_mention(user)
 
         lst_of_btns = [
@@ -512,8 +511,8 @@ class GameRoundBotManager:
         new_message = self.bot_manager.get_message(
             text, message.object.message.peer_id
         )
-        await self.app.storage.vk_api.send_message(
-            new_message, keyboard=keyboard
+        await self.app.storage.dispatcher.send_message(
+            new_message, keyboard=keyboard, priority=Priority.high
         )
 
         participant_id = await self.app.storage.game.get_participant_id(
@@ -533,8 +532,13 @@ class GameRoundBotManager:
         round_id = question.round
         attachment = None
         if "photo" in question.question:
-            attachment = question.question
-            question.question = "Что изображено на картинке?"
+            attachment = await self.app.storage.attachments.get(
+                question.question_id,
+                question.question,
+                message.object.message.peer_id,
+            )
+            if attachment:
+                question.question = "Что изображено на картинке?"
         elif "кот в мешке" in question.question:
             await self.bot_manager.cat_in_box_manager.suggest_random_members(
                 message,
@@ -569,7 +573,7 @@ class GameRoundBotManager:
         new_message = self.bot_manager.get_message(
             text, message.object.message.peer_id
         )
-        await self.app.storage.vk_api.send_message(
+        await self.app.storage.dispatcher.send_message(
             new_message, keyboard=keyboard, photo_id=attachment
         )
         await self.app.storage.game.change_game_status(
@@ -595,7 +599,7 @@ class GameRoundBotManager:
             self.time_limit_answering_msg(message, game_id, round_id)
         )
         self.ans_wait_task.add_done_callback(self._done_callback)
-        return await self.app.storage.vk_api.get_user_info(user_vk_id)
+        return await self.app.storage.user_directory.get(user_vk_id)
 
     async def reaction_on_ready_to_answer(self, message: Update):
         user_vk_id = message.object.message.from_id
@@ -615,7 +619,7 @@ class GameRoundBotManager:
         new_message = self.bot_manager.get_message(
             text, message.object.message.peer_id
         )
-        await self.app.storage.vk_api.send_message(new_message, keyboard=[])
+        await self.app.storage.dispatcher.send_message(new_message, keyboard=[])
 
     async def reaction_on_answer_question(self, message: Update):
         user_answer = message.object.message.text
@@ -647,7 +651,9 @@ class GameRoundBotManager:
         new_message = self.bot_manager.get_message(
             text, message.object.message.peer_id
         )
-        await self.app.storage.vk_api.send_message(new_message)
+        await self.app.storage.dispatcher.send_message(
+            new_message, priority=Priority.high
+        )
         await self.reaction_next_step_or_end(
             message, game_id, round_result, player_vk_id
         )
@@ -708,20 +714,23 @@ class BotManager:
     def logger(self):
         return self.app.config.logger
 
-    def is_member_a_game_bot(self, member_id: int) -> bool:
-        return member_id == -self.app.config.bot.group_id
+    def is_member_a_game_bot(
+        self, member_id: int, group_id: int | None = None
+    ) -> bool:
+        return member_id == -(group_id or self.app.config.bot.group_id)
 
-    async def handle_updates(self, update: dict):
+    async def handle_updates(self, update: Update | ChatInvite | None):
         if not update:
             return
-        if update["type"] == "message_event":
-            update = Update.from_dict(update)
+        current_group_id.set(update.group_id)
+        if update.type == "message_event":
             await self.process_event(update)
-        elif update["type"] == "chat_invite_user":
-            update = ChatInvite.from_dict(update)
+        elif update.type == "chat_invite_user":
+            await self.app.storage.vk_api.on_chat_invite_user(update)
             await self.process_chat_invite_event(update)
-        elif update["type"] == "message_new":
-            update = Update.from_dict(update)
+        elif update.type == "chat_kick_user":
+            self.app.storage.vk_api.on_chat_kick_user(update)
+        elif update.type == "message_new":
             await self.handle_message_new_type_updates(update)
 
     async def handle_message_new_type_updates(self, update: Update):
@@ -758,11 +767,11 @@ class BotManager:
         Нажимайте на кнопки и отвечайте на вопросы. Для досрочной \
         остановки команда: /stop"
         new_message = self.get_message(text, chat_id)
-        await self.app.storage.vk_api.send_message(new_message)
+        await self.app.storage.dispatcher.send_message(new_message)
 
     async def process_chat_invite_event(self, message: ChatInvite):
         chat_id = message.peer_id
-        if self.is_member_a_game_bot(message.member_id):
+        if self.is_member_a_game_bot(message.member_id, message.group_id):
             await self.send_bot_joins_chat_message(chat_id)
         elif message.member_id > 0:
             await self.preparation_manager.add_late_user_to_game(
@@ -779,6 +788,7 @@ class BotManager:
             user_id=None,
             text=text,
             peer_id=chat_id,
+            group_id=current_group_id.get(),
         )
 
     async def message_for_winners_end(
@@ -798,7 +808,7 @@ class BotManager:
                 )
         text = "".join(data)
         new_message = self.get_message(text, message.object.message.peer_id)
-        await self.app.storage.vk_api.send_message(new_message)
+        await self.app.storage.dispatcher.send_message(new_message)
         return True
 
     async def show_statistics_of_chat(self, message: Update):
@@ -814,7 +824,9 @@ class BotManager:
             )
         text = "\n".join(data_to_show)
         new_message = self.get_message(text, chat_id)
-        await self.send_continue_btn(chat_id, new_message)
+        await self.send_continue_btn(
+            chat_id, new_message, priority=Priority.low
+        )
 
     async def reaction_on_wrong_text(
         self, message: Update, text: str | None = ""
@@ -825,9 +837,11 @@ class BotManager:
             + text
         )
         new_message = self.get_message(text, message.object.message.peer_id)
-        await self.app.storage.vk_api.send_message(new_message)
+        await self.app.storage.dispatcher.send_message(new_message)
 
-    async def send_continue_btn(self, chat_id: int, text: str):
+    async def send_continue_btn(
+        self, chat_id: int, text: str, priority: Priority = Priority.normal
+    ):
         if not text:
             self.logger.error("no text")
             return
@@ -841,7 +855,9 @@ class BotManager:
             ),
         ]
         keyboard = BtnCreator().get_not_inline_callback_keyboard(lst_of_btns)
-        await self.app.storage.vk_api.send_message(text, keyboard=keyboard)
+        await self.app.storage.dispatcher.send_message(
+            text, keyboard=keyboard, priority=priority
+        )
 
     async def process_event(self, message: Update):
         """Callback on button"""
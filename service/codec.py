@@ -0,0 +1,76 @@
+"""Json encoding for vk api responses, queue messages and keyboards.
+
+Works on bytes. Uses orjson, a dependency of the service; msgspec
+or stdlib json only if orjson is missing from the environment.
+`dumps_str` is for places that need text, like form fields. `loads`
+raises `DecodeError` on malformed input.
+"""
+
+import json
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+
+def _default(obj):
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict:
+        return to_dict()
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"{type(obj).__name__} is not json serializable")
+
+
+if orjson:
+    BACKEND = "orjson"
+    DecodeError = orjson.JSONDecodeError
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def dumps_str(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def loads(data: bytes | str):
+        return orjson.loads(data)
+
+elif msgspec:
+    BACKEND = "msgspec"
+    DecodeError = msgspec.DecodeError
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj) -> bytes:
+        return _encoder.encode(obj)
+
+    def dumps_str(obj) -> str:
+        return _encoder.encode(obj).decode()
+
+    def loads(data: bytes | str):
+        return _decoder.decode(data)
+
+else:
+    BACKEND = "json"
+    # invalid utf-8 is a UnicodeDecodeError, not a JSONDecodeError
+    DecodeError = ValueError
+    _encoder = json.JSONEncoder(separators=(",", ":"), default=_default)
+
+    def dumps(obj) -> bytes:
+        return _encoder.encode(obj).encode()
+
+    def dumps_str(obj) -> str:
+        return _encoder.encode(obj)
+
+    def loads(data: bytes | str):
+        return json.loads(data)
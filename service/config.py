@@ -1,5 +1,5 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import lru_cache
 from os import environ
 from pathlib import Path
@@ -8,10 +8,18 @@ import yaml
 from dotenv import load_dotenv
 
 from service.bot.managers import BotManager
-from service.game.accessors import GameAccessor, GameAdminAccessor, UserAccessor
+from service.game.accessors import (
+    GameAccessor,
+    GameAdminAccessor,
+    LongPollAccessor,
+    UserAccessor,
+)
 from service.game.managers import GameManager
 from service.rabbitmq_service.accessor import QueueAccessor
 from service.vk_api.accessor import VkApiAccessor
+from service.vk_api.attachments import PhotoAttachments
+from service.vk_api.dispatcher import MessageDispatcher
+from service.vk_api.user_directory import UserDirectory
 
 # from pydantic_settings import BaseSettings
 
@@ -42,12 +50,16 @@ logger = logging.getLogger(__name__)
 class Storage:
     def __init__(self, app):
         self.user = UserAccessor(app)
+        self.user_directory = UserDirectory(app)
         self.vk_api = VkApiAccessor(app)
+        self.dispatcher = MessageDispatcher(app)
+        self.attachments = PhotoAttachments(app)
         self.bots_manager = BotManager(app)
         self.game = GameAccessor(app)
         self.game_manager = GameManager(app)
         self.que = QueueAccessor(app)
         self.admin = GameAdminAccessor(app)
+        self.long_poll = LongPollAccessor(app)
 
 
 @dataclass
@@ -60,10 +72,52 @@ class GameConfig:
     rounds: int
 
 
+@dataclass
+class GroupConfig:
+    token: str
+    group_id: int
+    tokens: list[str] = field(default_factory=list)
+
+
 @dataclass
 class BotConfig:
     token: str
     group_id: int
+    groups: list[GroupConfig] = field(default_factory=list)
+
+
+@dataclass
+class VkApiConfig:
+    api_path: str = "https://api.vk.com/method/"
+    execute_window: float = 0.05
+    execute_max_calls: int = 25
+    rate_limit: float = 20
+    rate_burst: int = 20
+    dispatcher_workers: int = 8
+    dispatcher_queue_size: int = 1000
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 3600
+    members_cache_size: int = 1000
+    members_cache_ttl: float = 600
+    http2: bool = False
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60
+    connect_timeout: float = 5
+    read_timeout: float = 10
+    retry_attempts: int = 3
+    retry_base_delay: float = 0.2
+    retry_max_delay: float = 5
+    breaker_failures: int = 5
+    breaker_reset_timeout: float = 30
+    token_suspend_time: float = 60
+    photos_dir: str = "images"
+    poller_backoff_base: float = 1
+    poller_backoff_max: float = 60
+    poller_down_after: int = 5
+    ingestion: str = "long_poll"
+    callback_confirmation: str = ""
+    callback_secret: str = ""
 
 
 @dataclass
@@ -81,12 +135,23 @@ class RabbitmqConfig:
     password: str
     host: str
     queue_title: str
+    backend: str = "rabbitmq"
+    memory_queue_size: int = 10000
+    partitions: int = 1
+    consume_partitions: list[int] = field(default_factory=list)
+    concurrency: int = 16
+    prefetch_count: int = 64
+    retry_delays: list[float] = field(default_factory=lambda: [1, 5, 30, 120])
+    schema_version: int = 2
+    compress_above: int = 1024
+    batch: bool = False
 
 
 @dataclass
 class Config:
     session: SessionConfig | None = None
     bot: BotConfig | None = None
+    vk_api: VkApiConfig | None = None
     database: DatabaseConfig | None = None
     game: GameConfig | None = None
     rabbit: RabbitmqConfig | None = None
@@ -113,7 +178,23 @@ def setup_config(config_path: str):
         bot=BotConfig(
             token=raw_config["bot"]["token"],
             group_id=int(raw_config["bot"]["group_id"]),
+            groups=[
+                GroupConfig(
+                    token=raw_config["bot"]["token"],
+                    group_id=int(raw_config["bot"]["group_id"]),
+                    tokens=raw_config["bot"].get("tokens") or [],
+                ),
+                *(
+                    GroupConfig(
+                        token=group["token"],
+                        group_id=int(group["group_id"]),
+                        tokens=group.get("tokens") or [],
+                    )
+                    for group in raw_config["bot"].get("groups") or []
+                ),
+            ],
         ),
+        vk_api=VkApiConfig(**(raw_config.get("vk_api") or {})),
         database=DatabaseConfig(**raw_config["database"]),
         game=GameConfig(rounds=int(raw_config["game"]["rounds"])),
         rabbit=RabbitmqConfig(**raw_config["rabbitmq"]),
@@ -1,6 +1,14 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 from service.dataclasses import CategoryEnum
@@ -32,10 +40,30 @@ class QuizModel(BaseModel):
     price: Mapped[int] = mapped_column(nullable=False, server_default="100")
 
 
+class QuizAttachmentModel(BaseModel):
+    """Uploaded photo of a question, per community"""
+
+    __tablename__ = "quiz_attachment"
+    __table_args__ = (UniqueConstraint("quiz_id", "group_id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    quiz_id: Mapped[int] = mapped_column(
+        ForeignKey("quiz.id", ondelete="CASCADE")
+    )
+    group_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    attachment: Mapped[str] = mapped_column(String(100), nullable=False)
+
+
 class GameModel(BaseModel):
+    """A game in a chat; peer_ids of chats repeat across communities"""
+
     __tablename__ = "game"
+    __table_args__ = (
+        Index("ix_game_group_id_chat_id", "group_id", "chat_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    group_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     chat_id: Mapped[int] = mapped_column(nullable=False)
     finished: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=None, nullable=True
@@ -69,3 +97,13 @@ class RoundModel(BaseModel):
     )
     used: Mapped[str] = mapped_column(nullable=True)
     player_answers: Mapped[int] = mapped_column(nullable=True)
+
+
+class LongPollModel(BaseModel):
+    __tablename__ = "long_poll"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    group_id: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, unique=True
+    )
+    ts: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import PlainTextResponse
+
+from service import codec
+
+api_router = APIRouter(
+    prefix="/v1",
+    tags=["vk"],
+)
+
+
+@api_router.post(
+    "/vk.callback",
+    response_class=PlainTextResponse,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Body is not an event"},
+        status.HTTP_403_FORBIDDEN: {"description": "Wrong secret or group"},
+        status.HTTP_404_NOT_FOUND: {"description": "Callback ingestion off"},
+    },
+)
+async def vk_callback_handler(request: Request):
+    """VK Callback API: confirmation and updates straight to the queue."""
+    config = request.app.config
+    vk_api = request.app.storage.vk_api
+    if config.vk_api.ingestion not in ("callback", "both"):
+        return PlainTextResponse("not found", status.HTTP_404_NOT_FOUND)
+    try:
+        body = codec.loads(await request.body())
+    except codec.DecodeError:
+        body = None
+    if not isinstance(body, dict):
+        return PlainTextResponse("bad request", status.HTTP_400_BAD_REQUEST)
+    if (
+        body.get("secret") != config.vk_api.callback_secret
+        or body.get("group_id") not in vk_api.groups
+    ):
+        return PlainTextResponse("forbidden", status.HTTP_403_FORBIDDEN)
+    if body.get("type") == "confirmation":
+        return PlainTextResponse(config.vk_api.callback_confirmation)
+
+    updates = await vk_api.form_updates_lst({"updates": [body]})
+    if updates:
+        await request.app.storage.que.send_to_que(bunch=updates)
+    return PlainTextResponse("ok")
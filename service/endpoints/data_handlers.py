@@ -1,3 +1,6 @@
+import time
+from dataclasses import asdict
+
 from fastapi import APIRouter, Header, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
@@ -5,6 +8,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from service.game.schemes import OkAnswerSchema, QuizSchema
+from service.vk_api.poller import PollerHealth
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -95,3 +99,113 @@ async def get_user_handler(
             "data": user,
         },
     }
+
+
+@api_router.get(
+    "/dispatcher.stats",
+    response_model=OkAnswerSchema,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Bad request"},
+    },
+)
+async def get_dispatcher_stats_handler(
+    request: Request,
+):
+    """Outbound messages: queue depth and send latency."""
+    stats = request.app.storage.dispatcher.stats()
+    return {
+        "success": True,
+        "data": {
+            "status": 200,
+            "data": {"statistics": asdict(stats)},
+        },
+    }
+
+
+@api_router.get(
+    "/vk.health",
+    response_model=OkAnswerSchema,
+    responses={
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Poller down"},
+    },
+)
+async def get_vk_health_handler(
+    request: Request,
+):
+    """Long-poll of each community: healthy, degraded or down."""
+    now = time.monotonic()
+    groups = [
+        {
+            "group_id": group.group_id,
+            "health": group.poller.health.value,
+            "failures": group.poller.failures,
+            "last_success_ago": (
+                round(now - group.poller.last_success, 1)
+                if group.poller.last_success
+                else None
+            ),
+        }
+        for group in request.app.storage.vk_api.groups.values()
+        if group.poller
+    ]
+    down = any(group["health"] == PollerHealth.down for group in groups)
+    status_code = (
+        status.HTTP_503_SERVICE_UNAVAILABLE if down else status.HTTP_200_OK
+    )
+    return JSONResponse(
+        {
+            "success": not down,
+            "data": {"status": status_code, "data": {"groups": groups}},
+        },
+        status_code,
+    )
+
+
+@api_router.get(
+    "/queue.dead",
+    response_model=OkAnswerSchema,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Bad request"},
+    },
+)
+async def get_dead_letters_handler(
+    request: Request,
+    limit: int = 20,
+):
+    """Updates that failed every retry, oldest first."""
+    auth = request.headers.get("Authorization")
+    if not auth or auth.lower() != "bearer xxx":
+        return JSONResponse(None, 401, {"WWW-Authenticate": "Basic"})
+    messages = await request.app.storage.que.dead_letters(limit)
+    return {
+        "success": True,
+        "data": {
+            "status": 200,
+            "data": {"messages": messages},
+        },
+    }
+
+
+@api_router.post(
+    "/queue.replay",
+    response_model=OkAnswerSchema,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Bad request"},
+    },
+)
+async def replay_dead_letters_handler(
+    request: Request,
+    limit: int | None = None,
+):
+    """Puts dead letters back to their queues, all of them by default."""
+    auth = request.headers.get("Authorization")
+    if not auth or auth.lower() != "bearer xxx":
+        return JSONResponse(None, 401, {"WWW-Authenticate": "Basic"})
+    replayed = await request.app.storage.que.replay_dead_letters(limit)
+    return {
+        "success": True,
+        "data": {
+            "status": 200,
+            "data": {"replayed": replayed},
+        },
+    }
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+api_router = APIRouter(tags=["metrics"])
+
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_handler(request: Request):
+    """Vk api latency, errors, timeouts and http statuses by method."""
+    return PlainTextResponse(
+        request.app.storage.vk_api.metrics.render(),
+        media_type="text/plain; version=0.0.4",
+    )
@@ -30,12 +30,15 @@ from service.dataclasses import (
 )
 from service.db_setup.models import (
     GameModel,
+    LongPollModel,
     ParticipantModel,
+    QuizAttachmentModel,
     QuizModel,
     RoundModel,
     UserModel,
 )
 from service.game.schemes import StatusCountSchema, UserFoundSchema
+from service.vk_api.groups import current_group_id
 
 if TYPE_CHECKING:
     from fastapi import FastAPI
@@ -70,6 +73,15 @@ class GameAccessor(BaseAccessor):
         ...
         self.app = app
 
+    def group_id(self, group_id: int | None = None) -> int:
+        """Community of a chat: the given one, of the update being
+        handled or the main one. Chats are games of a community,
+        their peer_ids repeat across communities.
+        """
+        return (
+            group_id or current_group_id.get() or self.app.config.bot.group_id
+        )
+
     async def get_games(self) -> GameModel | None:
         query = sa_select(GameModel).order_by(GameModel.finished.desc())
         result = await self.get_db_result(query)
@@ -93,10 +105,14 @@ class GameAccessor(BaseAccessor):
         result = await self.get_db_result(query)
         return result.scalar()
 
-    async def chat_has_running_game(self, chat_id: int) -> int | None:
+    async def chat_has_running_game(
+        self, chat_id: int, group_id: int | None = None
+    ) -> int | None:
         """Game_id if there's one in the chat"""
         query = sa_select(GameModel.id).where(
-            GameModel.chat_id == chat_id, GameModel.finished.is_(None)
+            GameModel.group_id == self.group_id(group_id),
+            GameModel.chat_id == chat_id,
+            GameModel.finished.is_(None),
         )
         result = await self.get_db_result(query)
         return result.scalars().first()
@@ -121,6 +137,28 @@ class GameAccessor(BaseAccessor):
         result = await self.get_db_result(query)
         return result.scalar()
 
+    async def get_question_attachment(
+        self, question_id: int, group_id: int
+    ) -> str | None:
+        query = sa_select(QuizAttachmentModel.attachment).where(
+            QuizAttachmentModel.quiz_id == question_id,
+            QuizAttachmentModel.group_id == group_id,
+        )
+        result = await self.get_db_result(query)
+        return result.scalar()
+
+    async def save_question_attachment(
+        self, question_id: int, group_id: int, attachment: str
+    ) -> None:
+        query = (
+            sa_insert(QuizAttachmentModel)
+            .values(
+                quiz_id=question_id, group_id=group_id, attachment=attachment
+            )
+            .on_conflict_do_nothing()
+        )
+        await self.get_db_result(query)
+
     async def generate_rounds_for_game(
         self,
         game_id: int,
@@ -150,10 +188,14 @@ class GameAccessor(BaseAccessor):
         await async_session.commit()
         return result.all()  # [(9,), (10,), (11,)]
 
-    async def generate_new_game(self, chat_id: int) -> int | None:
+    async def generate_new_game(
+        self, chat_id: int, group_id: int | None = None
+    ) -> int | None:
         """Return game id"""
         new_game_query1 = (
-            sa_insert(GameModel).values(chat_id=chat_id).returning(GameModel.id)
+            sa_insert(GameModel)
+            .values(group_id=self.group_id(group_id), chat_id=chat_id)
+            .returning(GameModel.id)
         )
         status_change_query2 = sa_update(GameModel).values(
             status=GameStatusEnum.created_game.value
@@ -223,7 +265,10 @@ class GameAccessor(BaseAccessor):
         return [Winners(**elem._mapping) for elem in res]
 
     async def finish_game(
-        self, game_id: int | None = None, chat_id: int | None = None
+        self,
+        game_id: int | None = None,
+        chat_id: int | None = None,
+        group_id: int | None = None,
     ):
         if not game_id and not chat_id:
             return None
@@ -235,7 +280,10 @@ class GameAccessor(BaseAccessor):
         if game_id:
             query = query.where(GameModel.id == game_id)
         if chat_id:
-            query = query.where(GameModel.chat_id == chat_id)
+            query = query.where(
+                GameModel.group_id == self.group_id(group_id),
+                GameModel.chat_id == chat_id,
+            )
 
         result = await self.get_db_result(query)
         if result.rowcount and result.returned_defaults:
@@ -243,7 +291,7 @@ class GameAccessor(BaseAccessor):
         return None
 
     async def get_statistic_sum_score(
-        self, chat_id: int, limit: int = 100
+        self, chat_id: int, limit: int = 100, group_id: int | None = None
     ) -> list[Winners]:
         """Sum score from previous games in chat"""
         query = (
@@ -265,7 +313,9 @@ class GameAccessor(BaseAccessor):
                 )
             )
             .where(
-                GameModel.chat_id == chat_id, GameModel.finished.is_not(None)
+                GameModel.group_id == self.group_id(group_id),
+                GameModel.chat_id == chat_id,
+                GameModel.finished.is_not(None),
             )
             .group_by(
                 UserModel.id,
@@ -393,10 +443,10 @@ class GameAccessor(BaseAccessor):
         await self.get_db_result(query)
 
     async def mark_next_answering_player(
-        self, chat_id: int, player_vk_id: int
+        self, chat_id: int, player_vk_id: int, group_id: int | None = None
     ) -> int | None:
         """Return RoundModel.id"""
-        game_id = await self.chat_has_running_game(chat_id)
+        game_id = await self.chat_has_running_game(chat_id, group_id)
         if not game_id:
             return None
         query = (
@@ -597,3 +647,24 @@ class UserAccessor(BaseAccessor):
             await async_session.commit()
             user_id = select_user_id_result.scalars().first()
         return user_id
+
+
+class LongPollAccessor(BaseAccessor):
+    """Checkpoint of the last long-poll `ts` put to the queue"""
+
+    async def get_ts(self, group_id: int) -> str | None:
+        query = sa_select(LongPollModel.ts).where(
+            LongPollModel.group_id == group_id
+        )
+        result = await self.get_db_result(query)
+        return result.scalar()
+
+    async def save_ts(self, group_id: int, ts: str) -> None:
+        query = (
+            sa_insert(LongPollModel)
+            .values(group_id=group_id, ts=ts)
+            .on_conflict_do_update(
+                index_elements=[LongPollModel.group_id], set_={"ts": ts}
+            )
+        )
+        await self.get_db_result(query)
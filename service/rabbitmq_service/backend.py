@@ -0,0 +1,109 @@
+import asyncio
+import typing
+from collections import Counter
+from contextlib import asynccontextmanager
+
+from service.vk_api.dataclasses import ChatInvite, Update
+
+if typing.TYPE_CHECKING:
+    from fastapi import FastAPI
+
+
+def chat_key(update: Update | ChatInvite | None) -> tuple | None:
+    if update is None:
+        return None
+    return update.group_id, update.peer_id
+
+
+class ChatLocks:
+    """A lock per chat, dropped when nobody holds or waits for it.
+    Waiters get the lock in the order they asked for it.
+    """
+
+    def __init__(self) -> None:
+        self.locks: dict[tuple | None, asyncio.Lock] = {}
+        self.users: Counter[tuple | None] = Counter()
+
+    @asynccontextmanager
+    async def hold(self, key: tuple | None):
+        lock = self.locks.setdefault(key, asyncio.Lock())
+        self.users[key] += 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self.users[key] -= 1
+            if not self.users[key]:
+                del self.users[key]
+                del self.locks[key]
+
+
+class QueueBackend:
+    """Transport of updates from pollers to the bot manager.
+    Up to `concurrency` updates are handled at once, updates
+    of one chat one by one, in the order they were taken.
+    """
+
+    def __init__(self, app: "FastAPI") -> None:
+        self.app = app
+        self.concurrency = max(1, app.config.rabbit.concurrency)
+        # updates taken from the queue and not yet handled
+        self.prefetch_count = max(
+            self.concurrency, app.config.rabbit.prefetch_count
+        )
+        self.slots = asyncio.Semaphore(self.concurrency)
+        self.chat_locks = ChatLocks()
+
+    @property
+    def logger(self):
+        return self.app.config.logger
+
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+    async def publish(self, bunch: list[Update | ChatInvite]) -> None:
+        raise NotImplementedError
+
+    async def consume(self) -> None:
+        """Starts handing updates to the bot manager"""
+        raise NotImplementedError
+
+    async def stop_consuming(self) -> None:
+        """Updates already taken are handled, no new ones are taken"""
+
+    async def dead_letters(self, limit: int) -> list[dict]:
+        """Updates that failed every retry, they stay where they are"""
+        return []
+
+    async def replay_dead_letters(self, limit: int | None = None) -> int:
+        """Puts dead letters back to the queue, returns how many"""
+        return 0
+
+    async def handle(self, update: Update | ChatInvite | None) -> None:
+        _, exc = await self.handle_chat([update])
+        if exc:
+            raise exc
+
+    async def handle_chat(
+        self, updates: list[Update | ChatInvite | None]
+    ) -> tuple[list[Update | ChatInvite | None], Exception | None]:
+        """Updates of one chat one by one, under the chat lock. Stops
+        at the first failure and returns the updates left, from the
+        failed one on, with its exception.
+
+        Must be entered in the order updates were taken: the chat
+        lock is asked for before the first await.
+        """
+        async with self.chat_locks.hold(chat_key(updates[0])):
+            for i, update in enumerate(updates):
+                try:
+                    async with self.slots:
+                        await self.app.storage.bots_manager.handle_updates(
+                            update
+                        )
+                except Exception as exc:
+                    return updates[i:], exc
+        return [], None
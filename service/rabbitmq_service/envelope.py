@@ -0,0 +1,170 @@
+"""Queue messages of updates.
+
+Version 1 is the update as a json object, with no headers. Version 2
+packs the update as an array of its fields with msgpack (json only if
+msgpack is missing from the environment), compressed with zlib when
+large enough.
+Version 3 is a batch: the updates of one long-poll response as arrays
+of version 2 rows, one array per chat.
+The version travels in the `schema-version` header, the format in
+content type and encoding, so a worker reads messages of all versions.
+During a rolling deploy publishers keep `rabbitmq.schema_version: 1`
+and `rabbitmq.batch: false` until no older worker is left.
+"""
+
+import zlib
+
+import aio_pika
+from aio_pika.abc import AbstractMessage
+
+from service import codec
+from service.vk_api.dataclasses import (
+    ChatInvite,
+    Update,
+    UpdateEventMessage,
+    UpdateMessage,
+    UpdateObject,
+    parse_update,
+)
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+SCHEMA_VERSION = 2
+BATCH_VERSION = 3
+SCHEMA_HEADER = "schema-version"
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+DEFLATE = "deflate"
+
+# first field of a version 2 array
+MESSAGE, EVENT, INVITE = 0, 1, 2
+
+
+def to_row(item: Update | ChatInvite) -> list:
+    if isinstance(item, ChatInvite):
+        return [INVITE, item.type, item.group_id, item.peer_id, item.member_id]
+    message = item.object.message
+    if isinstance(message, UpdateEventMessage):
+        return [
+            EVENT,
+            item.type,
+            item.group_id,
+            message.from_id,
+            message.peer_id,
+            message.payload,
+            message.event_id,
+        ]
+    return [
+        MESSAGE,
+        item.type,
+        item.group_id,
+        message.from_id,
+        message.peer_id,
+        message.payload,
+        message.id,
+        message.text,
+    ]
+
+
+def from_row(row: list) -> Update | ChatInvite:
+    kind, type_, group_id, *fields = row
+    if kind == INVITE:
+        peer_id, member_id = fields
+        return ChatInvite(type_, peer_id, member_id, group_id)
+    if kind == EVENT:
+        from_id, peer_id, payload, event_id = fields
+        message = UpdateEventMessage(from_id, "", payload, peer_id, event_id)
+    else:
+        from_id, peer_id, payload, id_, text = fields
+        message = UpdateMessage(from_id, text, id_, payload, peer_id)
+    return Update(type_, UpdateObject(message), group_id)
+
+
+def dumps(obj) -> tuple[bytes, str]:
+    if msgpack:
+        return msgpack.packb(obj, use_bin_type=True), MSGPACK
+    return codec.dumps(obj), JSON
+
+
+def loads(body: bytes, content_type: str | None):
+    if content_type == MSGPACK:
+        if not msgpack:
+            raise ValueError("msgpack message, msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return codec.loads(body)
+
+
+def pack(obj, version: int, compress_above: int) -> aio_pika.Message:
+    body, content_type = dumps(obj)
+    content_encoding = None
+    if len(body) > compress_above:
+        body, content_encoding = zlib.compress(body, 1), DEFLATE
+    return aio_pika.Message(
+        body=body,
+        headers={SCHEMA_HEADER: version},
+        content_type=content_type,
+        content_encoding=content_encoding,
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
+
+
+def encode(
+    item: Update | ChatInvite,
+    version: int = SCHEMA_VERSION,
+    compress_above: int = 1024,
+) -> aio_pika.Message:
+    if version == 1:
+        return aio_pika.Message(
+            body=codec.dumps(item),
+            content_type=JSON,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        )
+    return pack(to_row(item), SCHEMA_VERSION, compress_above)
+
+
+def encode_batch(
+    chats: list[list[Update | ChatInvite]], compress_above: int = 1024
+) -> aio_pika.Message:
+    """One message of updates grouped by chat"""
+    return pack(
+        [[to_row(item) for item in chat] for chat in chats],
+        BATCH_VERSION,
+        compress_above,
+    )
+
+
+def version_of(message: AbstractMessage) -> int:
+    return int((message.headers or {}).get(SCHEMA_HEADER, 1))
+
+
+def unpack(message: AbstractMessage):
+    body = message.body
+    if message.content_encoding == DEFLATE:
+        body = zlib.decompress(body)
+    return loads(body, message.content_type)
+
+
+def decode(message: AbstractMessage) -> Update | ChatInvite | None:
+    """Typed update of a single update message of any known version,
+    ValueError for a batch or a newer version
+    """
+    version = version_of(message)
+    if version == 1:
+        return parse_update(unpack(message))
+    if version == SCHEMA_VERSION:
+        return from_row(unpack(message))
+    raise ValueError(f"not a single update, schema version {version}")
+
+
+def decode_batch(
+    message: AbstractMessage,
+) -> list[list[Update | ChatInvite | None]]:
+    """Updates grouped by chat, a single update message gives
+    one chat of one update
+    """
+    if version_of(message) == BATCH_VERSION:
+        return [[from_row(row) for row in chat] for chat in unpack(message)]
+    return [[decode(message)]]
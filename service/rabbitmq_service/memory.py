@@ -0,0 +1,109 @@
+import asyncio
+from collections import deque
+
+from service.rabbitmq_service.backend import QueueBackend
+from service.vk_api.dataclasses import ChatInvite, Update
+
+# put after the last update when consuming stops
+STOP = object()
+
+
+class MemoryQueueBackend(QueueBackend):
+    """Bounded asyncio.Queue for a single process: typed updates are
+    handed over as they are, without serialization. A full queue
+    makes pollers wait.
+
+    A failed update is put back to the queue after the n-th of
+    `retry_delays`, like the rabbitmq backend does, and kept as a dead
+    letter after the last one. Retries still waiting are dropped when
+    consuming stops, as the queue itself does not outlive the process.
+    """
+
+    def __init__(self, app) -> None:
+        super().__init__(app)
+        self.retry_delays = app.config.rabbit.retry_delays
+        # updates with the number of retries they went through
+        self.queue: asyncio.Queue = asyncio.Queue(
+            maxsize=app.config.rabbit.memory_queue_size
+        )
+        self.dead: deque[tuple[Update | ChatInvite, str, int]] = deque(
+            maxlen=app.config.rabbit.memory_queue_size
+        )
+        self.retrying: set[asyncio.Task] = set()
+
+    async def publish(self, bunch: list[Update | ChatInvite]) -> None:
+        for update in bunch:
+            await self.queue.put((update, 0))
+
+    async def process(self, update: Update | ChatInvite, retries: int) -> None:
+        try:
+            await self.handle(update)
+        except Exception as exc:
+            self.logger.error(
+                "Error processing update %s", update, exc_info=exc
+            )
+            self.retry(update, retries, exc)
+        finally:
+            self.queue.task_done()
+
+    def retry(self, update: Update | ChatInvite, retries: int, exc) -> None:
+        """Redelivery after the next of `retry_delays`"""
+        if retries >= len(self.retry_delays):
+            self.dead.append((update, repr(exc)[:500], retries))
+            return
+        task = asyncio.create_task(
+            self.redeliver(update, retries + 1, self.retry_delays[retries])
+        )
+        self.retrying.add(task)
+        task.add_done_callback(self.retrying.discard)
+
+    async def redeliver(
+        self, update: Update | ChatInvite, retries: int, delay: float
+    ) -> None:
+        await asyncio.sleep(delay)
+        await self.queue.put((update, retries))
+
+    async def consume(self) -> None:
+        taken = asyncio.Semaphore(self.prefetch_count)
+        tasks: set[asyncio.Task] = set()
+
+        def done(task: asyncio.Task) -> None:
+            tasks.discard(task)
+            taken.release()
+
+        while True:
+            await taken.acquire()
+            item = await self.queue.get()
+            if item is STOP:
+                self.queue.task_done()
+                break
+            task = asyncio.create_task(self.process(*item))
+            tasks.add(task)
+            task.add_done_callback(done)
+        await asyncio.gather(*tasks)
+
+    async def stop_consuming(self) -> None:
+        if self.retrying:
+            self.logger.warning(
+                "%s updates dropped before their retry", len(self.retrying)
+            )
+        for task in self.retrying:
+            task.cancel()
+        await self.queue.put(STOP)
+
+    async def dead_letters(self, limit: int) -> list[dict]:
+        return [
+            {
+                "origin": None,
+                "retries": retries,
+                "error": error,
+                "body": update.to_dict(),
+            }
+            for update, error, retries in list(self.dead)[:limit]
+        ]
+
+    async def replay_dead_letters(self, limit: int | None = None) -> int:
+        limit = len(self.dead) if limit is None else min(limit, len(self.dead))
+        bunch = [self.dead.popleft()[0] for _ in range(limit)]
+        await self.publish(bunch)
+        return len(bunch)
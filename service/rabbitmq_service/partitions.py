@@ -0,0 +1,28 @@
+from service.vk_api.dataclasses import ChatInvite, Update
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping, Veach): when buckets grow
+    from n to n + 1, only 1 / (n + 1) of keys move
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def partition_of(update: Update | ChatInvite, partitions: int) -> int:
+    """Updates of one chat always land in the same partition"""
+    if partitions <= 1:
+        return 0
+    key = ((update.group_id or 0) << 32) | (update.peer_id or 0)
+    return jump_hash(key, partitions)
+
+
+def queue_name(queue_title: str, partition: int, partitions: int) -> str:
+    if partitions <= 1:
+        return queue_title
+    return f"{queue_title}.{partition}"
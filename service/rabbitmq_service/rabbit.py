@@ -0,0 +1,467 @@
+import asyncio
+from collections import deque
+
+import aio_pika
+import pamqp
+from aio_pika import ExchangeType
+from aio_pika.abc import (
+    AbstractChannel,
+    AbstractExchange,
+    AbstractIncomingMessage,
+    AbstractMessage,
+    AbstractQueue,
+    AbstractRobustConnection,
+)
+
+from service.rabbitmq_service import envelope
+from service.rabbitmq_service.backend import QueueBackend, chat_key
+from service.rabbitmq_service.partitions import partition_of, queue_name
+from service.vk_api.dataclasses import ChatInvite, Update
+
+RETRY_COUNT = "retry-count"
+RETRY_LEVEL = "retry-level"
+ORIGIN_QUEUE = "origin-queue"
+ERROR = "error"
+
+
+class AckBatcher:
+    """Acks messages of a channel as soon as they are settled, so a
+    slow chat never holds the acks of others and the prefetch window
+    keeps moving. A run of settled messages at the head of delivery
+    order is acked at once with multiple=True; a message settled
+    behind an unfinished one is acked alone. One that could not be
+    rerouted after a failure is nacked alone and requeued.
+    """
+
+    def __init__(self, logger) -> None:
+        self.logger = logger
+        self.pending: deque[AbstractIncomingMessage] = deque()
+        # settled, not yet acked
+        self.results: dict[int, tuple[AbstractIncomingMessage, bool]] = {}
+        # acked alone, still behind an unfinished message
+        self.acked: set[int] = set()
+        self.lock = asyncio.Lock()
+
+    def delivered(self, message: AbstractIncomingMessage) -> None:
+        self.pending.append(message)
+
+    async def done(self, message: AbstractIncomingMessage, ok: bool) -> None:
+        self.results[id(message)] = (message, ok)
+        async with self.lock:
+            # decided without awaiting, while the head can't move
+            settles = []
+            last_handled = None
+            while self.pending and (
+                id(self.pending[0]) in self.results
+                or id(self.pending[0]) in self.acked
+            ):
+                head = self.pending.popleft()
+                if id(head) in self.acked:
+                    self.acked.discard(id(head))
+                    continue
+                _, handled = self.results.pop(id(head))
+                if handled:
+                    last_handled = head
+                    continue
+                if last_handled:
+                    settles.append(last_handled.ack(multiple=True))
+                    last_handled = None
+                settles.append(head.nack(requeue=True))
+            if last_handled:
+                settles.append(last_handled.ack(multiple=True))
+            # the rest wait behind an unfinished message
+            for key, (settled, handled) in self.results.items():
+                self.acked.add(key)
+                if handled:
+                    settles.append(settled.ack())
+                else:
+                    settles.append(settled.nack(requeue=True))
+            self.results.clear()
+            for awaitable in settles:
+                await self.settle(awaitable)
+
+    async def settle(self, awaitable) -> None:
+        try:
+            await awaitable
+        except Exception as exc:
+            self.logger.error("ack not sent", exc_info=exc)
+
+
+class RabbitQueueBackend(QueueBackend):
+    """Durable RabbitMQ queue, updates travel in the envelope
+    of `rabbitmq.schema_version`, or batched per long-poll response
+    with `rabbitmq.batch`.
+
+    A failed update is published to the headers exchange
+    <queue_title>.retry and waits in <queue_title>.retry.<n> for the
+    n-th of `retry_delays`; when its ttl runs out it is dead-lettered
+    back to the queue it came from. After the last retry, and at once
+    when it can't be decoded, it goes to <queue_title>.dead.
+
+    Partition queues are declared with x-single-active-consumer:
+    of the replicas consuming a partition one takes its messages and
+    the others stand by, so a chat is never handled in two processes.
+    The single queue of `partitions: 1` keeps its old arguments,
+    rabbitmq refuses to redeclare an existing queue with new ones.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.username = self.app.config.rabbit.user
+        self.password = str(self.app.config.rabbit.password)
+        self.host = self.app.config.rabbit.host
+        self.queue_title = self.app.config.rabbit.queue_title
+        self.partitions = max(1, self.app.config.rabbit.partitions)
+        self.queue_names = [
+            queue_name(self.queue_title, partition, self.partitions)
+            for partition in range(self.partitions)
+        ]
+        self.queue_arguments = (
+            {"x-single-active-consumer": True} if self.partitions > 1 else None
+        )
+        # partitions consumed by this process, all by default
+        self.own_partitions = (
+            self.app.config.rabbit.consume_partitions or range(self.partitions)
+        )
+        self.retry_delays = self.app.config.rabbit.retry_delays
+        self.schema_version = self.app.config.rabbit.schema_version
+        self.compress_above = self.app.config.rabbit.compress_above
+        self.batch = self.app.config.rabbit.batch
+        self.retry_exchange_name = f"{self.queue_title}.retry"
+        self.dead_queue_name = f"{self.queue_title}.dead"
+        self.retry_exchange: AbstractExchange | None = None
+        self.async_connection: AbstractRobustConnection | None = None
+        self.async_channel: AbstractChannel | None = None
+        self.publish_channel: AbstractChannel | None = None
+        self.connect_lock = asyncio.Lock()
+        self.acks = AckBatcher(self.logger)
+        self.consumers: list[tuple[AbstractQueue, str]] = []
+        self.handling: set[asyncio.Task] = set()
+
+    async def connect(self):
+        async with self.connect_lock:
+            if not self.async_connection or self.async_connection.is_closed:
+                self.async_connection = await aio_pika.connect_robust(
+                    host=self.host,
+                    login=self.username,
+                    password=self.password,
+                    port=5672,
+                )
+            if not self.publish_channel or self.publish_channel.is_closed:
+                # robust channel: reopened and queue redeclared on reconnect
+                self.publish_channel = await self.async_connection.channel(
+                    publisher_confirms=True
+                )
+                await self.declare_topology(self.publish_channel)
+
+    async def declare_topology(self, channel: AbstractChannel) -> None:
+        for name in self.queue_names:
+            await channel.declare_queue(
+                name,
+                durable=True,
+                auto_delete=False,
+                arguments=self.queue_arguments,
+            )
+        self.retry_exchange = await channel.declare_exchange(
+            self.retry_exchange_name, ExchangeType.HEADERS, durable=True
+        )
+        for level, delay in enumerate(self.retry_delays):
+            queue = await channel.declare_queue(
+                f"{self.retry_exchange_name}.{level}",
+                durable=True,
+                arguments={
+                    "x-message-ttl": int(delay * 1000),
+                    # expired messages go back by their routing key
+                    "x-dead-letter-exchange": "",
+                },
+            )
+            await queue.bind(
+                self.retry_exchange,
+                arguments={"x-match": "all", RETRY_LEVEL: str(level)},
+            )
+        await channel.declare_queue(self.dead_queue_name, durable=True)
+
+    async def disconnect(self):
+        if self.async_channel:
+            await self.async_channel.close()
+        if self.publish_channel:
+            await self.publish_channel.close()
+        if self.async_connection:
+            await self.async_connection.close()
+
+    async def publish(self, bunch: list[Update | ChatInvite]) -> None:
+        """All messages go out at once, then confirms are awaited together"""
+        if not self.publish_channel or self.publish_channel.is_closed:
+            await self.connect()
+        exchange = self.publish_channel.default_exchange
+        if self.batch:
+            messages = self.batch_messages(bunch)
+        else:
+            messages = [
+                (
+                    envelope.encode(
+                        item, self.schema_version, self.compress_above
+                    ),
+                    self.queue_names[partition_of(item, self.partitions)],
+                )
+                for item in bunch
+            ]
+        await asyncio.gather(
+            *(
+                exchange.publish(message, routing_key=routing_key)
+                for message, routing_key in messages
+            )
+        )
+        self.logger.info(
+            "Sent to_que %s updates in %s messages", len(bunch), len(messages)
+        )
+
+    def batch_messages(
+        self, bunch: list[Update | ChatInvite]
+    ) -> list[tuple[aio_pika.Message, str]]:
+        """Updates grouped by chat, one message per partition"""
+        chats: dict[tuple | None, list[Update | ChatInvite]] = {}
+        for item in bunch:
+            chats.setdefault(chat_key(item), []).append(item)
+        partitions: dict[int, list[list[Update | ChatInvite]]] = {}
+        for chat in chats.values():
+            partition = partition_of(chat[0], self.partitions)
+            partitions.setdefault(partition, []).append(chat)
+        return [
+            (
+                envelope.encode_batch(chats, self.compress_above),
+                self.queue_names[partition],
+            )
+            for partition, chats in partitions.items()
+        ]
+
+    async def process_message(self, message: AbstractIncomingMessage) -> None:
+        """Called in a task per message, in delivery order. Chats of
+        a batch are handled concurrently, only the updates of failed
+        chats are retried.
+        """
+        task = asyncio.current_task()
+        self.handling.add(task)
+        self.acks.delivered(message)
+        try:
+            try:
+                chats = envelope.decode_batch(message)
+            except Exception as exc:
+                self.logger.error(
+                    f"Undecodable message {message}: ", exc_info=exc
+                )
+                ok = await self.dead_letter(message, exc)
+            else:
+                results = await asyncio.gather(
+                    *(self.handle_chat(chat) for chat in chats)
+                )
+                failed = [(left, exc) for left, exc in results if exc]
+                for _, exc in failed:
+                    self.logger.error(
+                        f"Error processing message {message}: ", exc_info=exc
+                    )
+                if not failed:
+                    ok = True
+                elif len(chats) == 1 and len(chats[0]) == len(failed[0][0]):
+                    ok = await self.retry(message, failed[0][1])
+                else:
+                    ok = await self.retry(
+                        message,
+                        failed[0][1],
+                        envelope.encode_batch(
+                            [left for left, _ in failed], self.compress_above
+                        ),
+                    )
+            await self.acks.done(message, ok=ok)
+        finally:
+            self.handling.discard(task)
+
+    @staticmethod
+    def own_headers(message: AbstractIncomingMessage) -> dict:
+        """Headers of the message without the ones set by rabbitmq"""
+        return {
+            key: value
+            for key, value in (message.headers or {}).items()
+            if not key.startswith("x-")
+        }
+
+    async def republish(
+        self,
+        message: AbstractMessage,
+        exchange: AbstractExchange,
+        routing_key: str,
+        headers: dict,
+    ) -> bool:
+        try:
+            await exchange.publish(
+                aio_pika.Message(
+                    body=message.body,
+                    headers=headers,
+                    content_type=message.content_type,
+                    content_encoding=message.content_encoding,
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                ),
+                routing_key=routing_key,
+            )
+        except Exception as exc:
+            self.logger.error("message not republished", exc_info=exc)
+            return False
+        return True
+
+    async def retry(
+        self,
+        message: AbstractIncomingMessage,
+        exc,
+        payload: AbstractMessage | None = None,
+    ) -> bool:
+        """Redelivery after the next of `retry_delays`, False when
+        the message could not be republished. `payload` replaces
+        the body of the message, like the failed part of a batch.
+        """
+        headers = self.own_headers(message)
+        retries = int(headers.get(RETRY_COUNT, 0))
+        if retries >= len(self.retry_delays):
+            return await self.dead_letter(message, exc, payload)
+        if not self.publish_channel or self.publish_channel.is_closed:
+            await self.connect()
+        return await self.republish(
+            payload or message,
+            self.retry_exchange,
+            message.routing_key,
+            {
+                **headers,
+                RETRY_COUNT: retries + 1,
+                RETRY_LEVEL: str(retries),
+                ORIGIN_QUEUE: message.routing_key,
+            },
+        )
+
+    async def dead_letter(
+        self,
+        message: AbstractIncomingMessage,
+        exc,
+        payload: AbstractMessage | None = None,
+    ) -> bool:
+        if not self.publish_channel or self.publish_channel.is_closed:
+            await self.connect()
+        headers = self.own_headers(message)
+        return await self.republish(
+            payload or message,
+            self.publish_channel.default_exchange,
+            self.dead_queue_name,
+            {
+                **headers,
+                ORIGIN_QUEUE: headers.get(ORIGIN_QUEUE, message.routing_key),
+                ERROR: repr(exc)[:500],
+            },
+        )
+
+    @staticmethod
+    def describe(message: AbstractIncomingMessage) -> dict:
+        headers = message.headers or {}
+        try:
+            body = [
+                update.to_dict()
+                for chat in envelope.decode_batch(message)
+                for update in chat
+            ]
+            if envelope.version_of(message) != envelope.BATCH_VERSION:
+                body = body[0]
+        except Exception:
+            body = message.body.decode(errors="replace")
+        return {
+            "origin": headers.get(ORIGIN_QUEUE),
+            "retries": headers.get(RETRY_COUNT, 0),
+            "error": headers.get(ERROR),
+            "body": body,
+        }
+
+    async def dead_letters(self, limit: int) -> list[dict]:
+        await self.connect()
+        # unacked messages go back to the queue when the channel closes
+        channel = await self.async_connection.channel()
+        try:
+            queue = await channel.declare_queue(
+                self.dead_queue_name, durable=True
+            )
+            messages = []
+            while len(messages) < limit:
+                message = await queue.get(no_ack=False, fail=False)
+                if message is None:
+                    break
+                messages.append(self.describe(message))
+            return messages
+        finally:
+            await channel.close()
+
+    async def replay_dead_letters(self, limit: int | None = None) -> int:
+        """Messages that die again while replaying are not replayed twice:
+        at most the number of dead letters at the start is taken
+        """
+        await self.connect()
+        channel = await self.async_connection.channel()
+        replayed = 0
+        try:
+            queue = await channel.declare_queue(
+                self.dead_queue_name, durable=True
+            )
+            count = queue.declaration_result.message_count
+            limit = count if limit is None else min(limit, count)
+            while replayed < limit:
+                message = await queue.get(no_ack=False, fail=False)
+                if message is None:
+                    break
+                headers = self.own_headers(message)
+                origin = headers.pop(ORIGIN_QUEUE, None) or self.queue_names[0]
+                for key in (RETRY_COUNT, RETRY_LEVEL, ERROR):
+                    headers.pop(key, None)
+                if not await self.republish(
+                    message,
+                    self.publish_channel.default_exchange,
+                    origin,
+                    headers,
+                ):
+                    break
+                await message.ack()
+                replayed += 1
+        finally:
+            await channel.close()
+        self.logger.info("replayed %s dead letters", replayed)
+        return replayed
+
+    async def consume(self) -> None:
+        """Create connection to rabbitmq, start process of receiving data.
+        Up to `prefetch_count` messages of all partitions are taken
+        at once, chat locks keep the order of every chat.
+        """
+        await self.connect()
+        if not self.async_channel or self.async_channel.is_closed:
+            self.async_channel = await self.async_connection.channel()
+        await self.async_channel.set_qos(
+            prefetch_count=self.prefetch_count, global_=True
+        )
+        try:
+            for partition in self.own_partitions:
+                queue: AbstractQueue = await self.async_channel.declare_queue(
+                    self.queue_names[partition],
+                    durable=True,
+                    auto_delete=False,
+                    arguments=self.queue_arguments,
+                )
+                consumer_tag = await queue.consume(
+                    callback=self.process_message, no_ack=False
+                )
+                self.consumers.append((queue, consumer_tag))
+        except pamqp.exceptions.AMQPFrameError:
+            self.logger.error("closed connection AMQPFrameError")
+        except KeyboardInterrupt:
+            await self.async_connection.close()
+            self.logger.info("QueueAccessor closed async_connection")
+        # finally:
+        #     await channel.close()
+
+    async def stop_consuming(self) -> None:
+        for queue, consumer_tag in self.consumers:
+            await queue.cancel(consumer_tag)
+        self.consumers = []
+        await asyncio.gather(*self.handling, return_exceptions=True)
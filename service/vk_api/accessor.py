@@ -1,32 +1,52 @@
 import asyncio
-import json
+import functools
+import importlib.util
 import random
+import time
 import typing
 from asyncio import Future
+from collections.abc import Awaitable
+from pathlib import Path
 from urllib.parse import urlencode, urljoin
 
 import httpx
 from httpx import AsyncClient
 
+from service import codec
 from service.dataclasses import UserDto
+from service.vk_api.batcher import ExecuteBatcher
+from service.vk_api.circuit_breaker import CircuitBreaker
 from service.vk_api.dataclasses import (
     ChatInvite,
     Message,
     Update,
     UpdateEventMessage,
-    UpdateMessage,
-    UpdateObject,
 )
+from service.vk_api.exceptions import (
+    TOKEN_CODES,
+    VkApiError,
+    VkHttpError,
+    is_retryable,
+    is_token_error,
+)
+from service.vk_api.groups import GroupSession, current_group_id
+from service.vk_api.members_cache import ConversationMembersCache
+from service.vk_api.metrics import ApiMetrics
 from service.vk_api.poller import Poller
+from service.vk_api.rate_limiter import Priority, RateLimiter
+from service.vk_api.token_pool import PooledToken, TokenPool
 from service.vk_api.worker import Worker
 
 # from app.base.base_accessor import BaseAccessor
 if typing.TYPE_CHECKING:
     from fastapi import FastAPI
 
+    from service.config import GroupConfig
+
 
-API_PATH = "https://api.vk.com/method/"
 API_VERSION = "5.131"
+LONG_POLL_WAIT = 25
+EMPTY_KEYBOARD = codec.dumps_str({"buttons": []})
 
 
 class VkApiAccessor:
@@ -35,99 +55,386 @@ class VkApiAccessor:
         self.app = app
 
         self.session: AsyncClient | None = None
-        self.key: str | None = None
-        self.server: str | None = None
-        self.poller: Poller | None = None
+        self.poll_session: AsyncClient | None = None
         self.worker: Worker | None = None
-        self.ts: int | None = None
         self.token = app.config.bot.token
         self.group_id = app.config.bot.group_id
+        self.config = app.config.vk_api
+        self.groups: dict[int, GroupSession] = {
+            group.group_id: GroupSession(
+                group_id=group.group_id,
+                tokens=self._make_token_pool(group),
+            )
+            for group in app.config.bot.groups
+        }
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.metrics = ApiMetrics()
+        self.members_cache = ConversationMembersCache(
+            maxsize=self.config.members_cache_size,
+            ttl=self.config.members_cache_ttl,
+        )
 
     @property
     def logger(self):
         return self.app.config.logger
 
-    async def connect(self) -> None:
-        self.session = httpx.AsyncClient()
+    def _make_token_pool(self, group: "GroupConfig") -> TokenPool:
+        return TokenPool(
+            [
+                PooledToken(
+                    token=token,
+                    rate_limiter=RateLimiter(
+                        rate=self.config.rate_limit,
+                        burst=self.config.rate_burst,
+                    ),
+                    base_params={
+                        "access_token": token,
+                        "v": API_VERSION,
+                        "group_id": group.group_id,
+                    },
+                )
+                for token in dict.fromkeys([group.token, *group.tokens])
+            ],
+            suspend_time=self.config.token_suspend_time,
+        )
 
-        try:
-            await self._get_long_poll_service()
-        except Exception as e:
-            self.logger.error("Exception", exc_info=e)
+    def group(self, group_id: int | None = None) -> GroupSession:
+        """Session of the given community, of the update being handled
+        or the main one
+        """
+        group_id = group_id or current_group_id.get()
+        return self.groups.get(group_id) or self.groups[self.group_id]
+
+    async def connect(self) -> None:
+        if (
+            self.config.ingestion in ("callback", "both")
+            and not self.config.callback_secret
+        ):
+            raise ValueError("callback ingestion needs vk_api.callback_secret")
+        self.session = self._make_api_client()
+        self.poll_session = self._make_long_poll_client()
+        for group in self.groups.values():
+            if self.config.execute_max_calls > 1:
+                group.batcher = ExecuteBatcher(
+                    functools.partial(self._request, group_id=group.group_id),
+                    window=self.config.execute_window,
+                    max_calls=self.config.execute_max_calls,
+                )
 
-        self.poller = Poller(self.app)
-        self.poller.start()
-        self.logger.info("Vk Poller starts polling from api to queue")
+        if self.config.ingestion in ("long_poll", "both"):
+            for group in self.groups.values():
+                group.poller = Poller(self.app, group.group_id)
+                group.poller.start()
+                self.logger.info(
+                    "Vk Poller starts polling group %s to queue",
+                    group.group_id,
+                )
 
         self.worker = Worker(self.app)
         self.worker.start()
         self.logger.info("Worker starts getting from queue")
 
     async def disconnect(self) -> None:
-        if self.session:
-            await self.session.aclose()
-
-        if self.poller:
-            await self.poller.stop()
-            self.logger.info("Vk Poller stopped")
+        """Pollers and worker stop first, the http clients they
+        send through are closed last
+        """
+        for group in self.groups.values():
+            if group.poller:
+                await group.poller.stop()
+                self.logger.info("Vk Poller %s stopped", group.group_id)
         if self.worker:
             await self.worker.stop()
             self.logger.info("Worker stopped")
 
+        for group in self.groups.values():
+            if group.batcher:
+                await group.batcher.close()
+        if self.session:
+            await self.session.aclose()
+        if self.poll_session:
+            await self.poll_session.aclose()
+
+    def _make_api_client(self) -> AsyncClient:
+        """Keep-alive pool for api methods, optionally over http/2"""
+        config = self.config
+        http2 = config.http2
+        if http2 and not importlib.util.find_spec("h2"):
+            self.logger.warning("http2 needs `h2` package, using http/1.1")
+            http2 = False
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                config.read_timeout, connect=config.connect_timeout
+            ),
+        )
+
+    def _make_long_poll_client(self) -> AsyncClient:
+        """One connection per community that waits for long-poll answers"""
+        connections = len(self.groups)
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=connections,
+                max_keepalive_connections=connections,
+            ),
+            timeout=httpx.Timeout(
+                LONG_POLL_WAIT + self.config.read_timeout,
+                connect=self.config.connect_timeout,
+            ),
+        )
+
     @staticmethod
     def _build_query(host: str, method: str, params: dict) -> str:
         params.setdefault("v", API_VERSION)
         return f"{urljoin(host, method)}?{urlencode(params)}"
 
-    async def _get_long_poll_service(self, type_access="groups") -> None:
-        url = self._build_query(
-            host=API_PATH,
-            method=f"{type_access}.getLongPollServer",
-            params={
-                "group_id": self.group_id,
-                "access_token": self.token,
-            },
+    async def _get_long_poll_service(
+        self, group_id: int, type_access="groups"
+    ) -> bool:
+        json_body = await self._request(
+            f"{type_access}.getLongPollServer",
+            params={},
+            priority=Priority.high,
+            group_id=group_id,
         )
-        response = await self.session.get(url)
-        if response.status_code == 200:
-            json_body = json.loads(response.text)
-            if "error" in json_body:
-                self.logger.error(json_body["error"])
-                return
-            data = json_body["response"]
-            self.key = data["key"]
-            self.server = data["server"]
-            self.ts = data["ts"]
+        if not json_body:
+            return False
+        if "error" in json_body:
+            self.logger.error(json_body["error"])
+            return False
+        data = json_body["response"]
+        group = self.groups[group_id]
+        group.key = data["key"]
+        group.server = data["server"]
+        group.ts = data["ts"]
+        return True
+
+    async def connect_long_poll(self, group_id: int) -> bool:
+        """Long-poll server for the community, on the first success
+        polling continues from the checkpoint
+        """
+        try:
+            if not await self._get_long_poll_service(group_id):
+                return False
+            group = self.groups[group_id]
+            if not group.resumed:
+                await self._resume_long_poll(group)
+        except Exception as exc:
+            self.logger.error("long-poll server not received", exc_info=exc)
+            return False
+        return True
+
+    async def _resume_long_poll(self, group: GroupSession) -> None:
+        """Continue from the checkpoint, events sent while the bot
+        was down come with the first poll. If the server no longer
+        keeps them, it answers `failed: 1` with a fresh ts.
+        """
+        group.resumed = True
+        try:
+            ts = await self.app.storage.long_poll.get_ts(group.group_id)
+        except Exception as exc:
+            self.logger.error("no checkpoint, fresh ts is used", exc_info=exc)
+            return
+        if ts:
+            self.logger.info("group %s resumes from ts %s", group.group_id, ts)
+            group.ts = ts
+        group.saved_ts = ts
+
+    async def _save_checkpoint(self, group: GroupSession) -> None:
+        if group.ts == group.saved_ts:
+            return
+        try:
+            await self.app.storage.long_poll.save_ts(
+                group.group_id, str(group.ts)
+            )
+        except Exception as exc:
+            self.logger.error("ts checkpoint not saved", exc_info=exc)
+        else:
+            group.saved_ts = group.ts
+
+    async def _request(
+        self,
+        method: str,
+        params: dict,
+        priority: Priority = Priority.normal,
+        group_id: int | None = None,
+    ) -> dict:
+        """One form-encoded POST to api method, json body of the response"""
+        group = self.group(group_id)
+        token = group.tokens.pick()
+        await token.rate_limiter.acquire(priority)
+        data = token.base_params.copy()
+        for key, value in params.items():
+            if value is not None:
+                data[key] = value
+        response = await self._timed(
+            method, self.session.post(self.config.api_path + method, data=data)
+        )
+        if response.status_code != 200:
+            raise VkHttpError(method, response.status_code)
+        json_body = codec.loads(response.content)
+        if self._token_failed(json_body):
+            group.tokens.suspend(token)
+            self.logger.warning(
+                "token ...%s of group %s suspended",
+                token.token[-4:],
+                group.group_id,
+            )
+        return json_body
+
+    async def _timed(
+        self, method: str, request: Awaitable[httpx.Response]
+    ) -> httpx.Response:
+        """Awaits the http request, recording its latency and outcome"""
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.TimeoutException:
+            self.metrics.timeout(method)
+            raise
+        finally:
+            self.metrics.observe_request(method, time.perf_counter() - started)
+        self.metrics.status(method, response.status_code)
+        return response
+
+    @staticmethod
+    def _token_failed(json_body: dict | None) -> bool:
+        """Auth or flood error, in the body or in one of `execute` calls"""
+        if not json_body:
+            return False
+        errors = [json_body.get("error") or {}]
+        errors.extend(json_body.get("execute_errors") or [])
+        return any(error.get("error_code") in TOKEN_CODES for error in errors)
+
+    def get_breaker(self, method: str) -> CircuitBreaker:
+        breaker = self.breakers.get(method)
+        if not breaker:
+            breaker = CircuitBreaker(
+                method,
+                failure_threshold=self.config.breaker_failures,
+                reset_timeout=self.config.breaker_reset_timeout,
+            )
+            self.breakers[method] = breaker
+        return breaker
+
+    def retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(
+            0,
+            min(
+                self.config.retry_max_delay,
+                self.config.retry_base_delay * 2**attempt,
+            ),
+        )
+
+    async def _call_once(
+        self, method: str, params: dict, priority: Priority, group_id: int
+    ) -> dict:
+        group = self.groups[group_id]
+        if group.batcher:
+            json_body = await group.batcher.call(method, params, priority)
+        else:
+            json_body = await self._request(method, params, priority, group_id)
+        if json_body is None:
+            self.metrics.error(method, None)
+            raise VkApiError(method)
+        if "error" in json_body:
+            self.metrics.error(method, json_body["error"].get("error_code"))
+            raise VkApiError(method, json_body["error"])
+        return json_body
+
+    async def _call(
+        self,
+        method: str,
+        params: dict,
+        priority: Priority = Priority.normal,
+        group_id: int | None = None,
+    ) -> dict:
+        """Api method call, coalesced with others into `execute`.
+        Retryable errors are retried, raises VkApiError otherwise.
+        """
+        started = time.perf_counter()
+        try:
+            return await self._call_with_retries(
+                method, params, priority, self.group(group_id)
+            )
+        finally:
+            self.metrics.observe_call(method, time.perf_counter() - started)
+
+    async def _call_with_retries(
+        self,
+        method: str,
+        params: dict,
+        priority: Priority,
+        group: GroupSession,
+    ) -> dict:
+        breaker = self.get_breaker(method)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                json_body = await self._call_once(
+                    method, params, priority, group.group_id
+                )
+            except Exception as exc:
+                # another token of the pool may go through right away
+                switch_token = is_token_error(exc) and group.tokens.active > 0
+                if not switch_token and not is_retryable(exc):
+                    breaker.record_success()
+                    raise
+                if switch_token:
+                    # vk answered, the token failed: a trial call
+                    # is settled before the next token is tried
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+                if attempt >= self.config.retry_attempts or breaker.is_open:
+                    raise
+                self.logger.warning("retry %s after %s", method, exc)
+                if not switch_token:
+                    await asyncio.sleep(self.retry_delay(attempt))
+                attempt += 1
+            except BaseException:
+                breaker.record_abandoned()
+                raise
+            else:
+                breaker.record_success()
+                return json_body
+
+    async def get_users_info(
+        self, user_ids: list[int], fields=("id", "first_name", "last_name")
+    ) -> list[UserDto]:
+        """Api method users.get. Getting information for up to 1000 users"""
+        try:
+            json_body = await self._call(
+                "users.get",
+                params={
+                    "user_ids": ",".join(str(user_id) for user_id in user_ids),
+                    "fields": ",".join(fields),
+                },
+            )
+        except VkApiError as exc:
+            self.logger.error(exc)
+            return []
+        return [
+            UserDto(
+                vk_id=user["id"],
+                first_name=user["first_name"],
+                second_name=user["last_name"],
+            )
+            for user in json_body["response"]
+        ]
 
     async def get_user_info(
         self, user_id, fields=("id", "first_name", "last_name")
     ) -> UserDto | None:
         """Api method users.get. Getting user information for user_id"""
-        url = self._build_query(
-            host=API_PATH,
-            method="users.get",
-            params={
-                "group_id": self.group_id,
-                "access_token": self.token,
-                "user_ids": user_id,
-                "fields": fields,
-            },
-        )
-        response = await self.session.get(url)
-        if response.status_code == 200:
-            json_body = json.loads(response.text)
-            if "error" in json_body:
-                self.logger.error(json_body["error"])
-                return None
-            user_info: list[dict] = json_body["response"]
-            user = user_info[0] if user_info else None
-            if not user:
-                return None
-        return UserDto(
-            vk_id=user["id"],
-            first_name=user["first_name"],
-            second_name=user["last_name"],
-        )
+        users = await self.get_users_info([user_id], fields)
+        return users[0] if users else None
 
     def get_members_user_only_list(self, data: dict) -> list[UserDto]:
         return [
@@ -141,92 +448,103 @@ class VkApiAccessor:
 
     async def get_conversation_members(self, peer_id):
         """Метод получает список участников беседы."""
-        url = self._build_query(
-            host=API_PATH,
-            method="messages.getConversationMembers",
-            params={
-                "group_id": self.app.config.bot.group_id,
-                "access_token": self.app.config.bot.token,
-                "peer_id": peer_id,
-            },
-        )
-        response = await self.session.get(url)
-        if response.status_code == 200:
-            json_body = json.loads(response.text)
-            if "error" in json_body:
-                self.logger.error(json_body["error"])
-                return None
-            data: list[dict] = json_body["response"]
-
-        return self.get_members_user_only_list(data)
+        group_id = self.group().group_id
+        members = self.members_cache.get(group_id, peer_id)
+        if members is not None:
+            return members
+        try:
+            json_body = await self._call(
+                "messages.getConversationMembers",
+                params={
+                    "group_id": group_id,
+                    "peer_id": peer_id,
+                },
+                group_id=group_id,
+            )
+        except VkApiError as exc:
+            self.logger.error(exc)
+            return None
+        data: dict = json_body["response"]
+        members = self.get_members_user_only_list(data)
+        self.app.storage.user_directory.put_many(members)
+        self.members_cache.set(group_id, peer_id, members)
+        return list(members)
 
     async def sent_answer_to_event(self, message: UpdateEventMessage):
         """Callback on button"""
-        url = self._build_query(
-            host=API_PATH,
-            method="messages.sendMessageEventAnswer",
-            params={
-                "group_id": self.group_id,
-                "access_token": self.token,
-                "event_id": message.object.message.event_id,
-                "user_id": message.object.message.from_id,
-                "peer_id": message.object.message.peer_id,
-            },
+        try:
+            await self._call(
+                "messages.sendMessageEventAnswer",
+                params={
+                    "event_id": message.object.message.event_id,
+                    "user_id": message.object.message.from_id,
+                    "peer_id": message.object.message.peer_id,
+                },
+                priority=Priority.high,
+                group_id=message.group_id,
+            )
+        except VkApiError as exc:
+            self.logger.error(exc)
+
+    async def upload_message_photo(self, path: Path, peer_id: int) -> str:
+        """Uploads a local image for messages, its attachment id"""
+        json_body = await self._call(
+            "photos.getMessagesUploadServer", params={"peer_id": peer_id}
         )
-        response = await self.session.get(url)
-        if response.status_code == 200:
-            json_body = json.loads(response.text)
-            if "error" in json_body:
-                self.logger.error(json_body["error"])
-
-    def get_upd_obj_event_message(self, update) -> UpdateObject:
-        return Update(
-            type=update["type"],
-            object=UpdateObject(
-                message=UpdateEventMessage(
-                    text="",
-                    from_id=update["object"].get("user_id", None),
-                    peer_id=update["object"].get("peer_id", None),
-                    payload=update["object"].get("payload", None),
-                    event_id=update["object"].get("event_id", None),
-                )
+        content = await asyncio.to_thread(path.read_bytes)
+        response = await self._timed(
+            "photos.upload",
+            self.session.post(
+                json_body["response"]["upload_url"],
+                files={"photo": (path.name, content)},
             ),
         )
-
-    def get_upd_obj_chat_invite(self, update) -> ChatInvite:
-        member_id = (
-            update["object"]["message"]["action"].get("member_id")
-            if update["object"]["message"]["action"]["type"]
-            == "chat_invite_user"
-            else update["object"]["message"]["from_id"]
-        )
-        return ChatInvite(
-            type="chat_invite_user",
-            peer_id=update["object"]["message"].get("peer_id", None),
-            member_id=member_id,
+        if response.status_code != 200:
+            raise VkHttpError("photos.upload", response.status_code)
+        uploaded = codec.loads(response.content)
+        json_body = await self._call(
+            "photos.saveMessagesPhoto",
+            params={
+                "photo": uploaded["photo"],
+                "server": uploaded["server"],
+                "hash": uploaded["hash"],
+            },
         )
+        photo = json_body["response"][0]
+        return f"photo{photo['owner_id']}_{photo['id']}"
+
+    async def on_chat_invite_user(self, invite: ChatInvite) -> None:
+        """Keeps a cached member list of the chat up to date, called
+        where updates are handled
+        """
+        if not invite.member_id or invite.member_id < 0:
+            return
+        if self.members_cache.get(invite.group_id, invite.peer_id) is None:
+            return
+        member = await self.app.storage.user_directory.get(invite.member_id)
+        if member:
+            self.members_cache.add_member(
+                invite.group_id, invite.peer_id, member
+            )
 
-    def get_upd_obj_update_message(self, update) -> UpdateObject:
-        return Update(
-            type=update["type"],
-            object=UpdateObject(
-                message=UpdateMessage(
-                    id=update["object"]["message"]["id"],
-                    from_id=update["object"]["message"]["from_id"],
-                    text=update["object"]["message"]["text"],
-                    peer_id=update["object"]["message"].get("peer_id", None),
-                    payload=update["object"]["message"].get("payload", None),
-                )
-            ),
-        )
+    def on_chat_kick_user(self, kick: ChatInvite) -> None:
+        if kick.member_id == -kick.group_id:
+            self.members_cache.invalidate(kick.group_id, kick.peer_id)
+        else:
+            self.members_cache.remove_member(
+                kick.group_id, kick.peer_id, kick.member_id
+            )
 
-    async def form_updates_lst(self, data: dict) -> list:
-        """In chats"""
+    async def form_updates_lst(
+        self, data: dict, group_id: int | None = None
+    ) -> list:
+        """In chats, tagged with the community they came to"""
         updates = []
         for update in data.get("updates", []):
+            upd_group_id = update.get("group_id") or group_id or self.group_id
             cur_upd = None
             if update["type"] == "message_event":
-                cur_upd = self.get_upd_obj_event_message(update)
+                cur_upd = Update.from_vk(update, upd_group_id)
             elif update["type"] == "message_new":
                 action_type = (
                     update["object"]["message"]
@@ -236,99 +554,105 @@ class VkApiAccessor:
                 if action_type in (
                     "chat_invite_user",
                     "chat_invite_user_by_link",
+                    "chat_kick_user",
                 ):
-                    cur_upd = self.get_upd_obj_chat_invite(update)
-                elif action_type == "chat_kick_user":
-                    pass
+                    cur_upd = ChatInvite.from_vk(update, upd_group_id)
                 else:
-                    cur_upd = self.get_upd_obj_update_message(update)
+                    cur_upd = Update.from_vk(update, upd_group_id)
             if cur_upd:
                 updates.append(cur_upd)
         return updates
 
     async def put_updates_to_queue(self, updates):
-        self.append_task = asyncio.create_task(
-            self.app.storage.que.send_to_que(bunch=updates)
-        )
-        self.append_task.add_done_callback(self._done_callback)
+        await self.app.storage.que.send_to_que(bunch=updates)
 
-    async def poll(self):
-        assert self.server
+    async def poll(self, group_id: int) -> bool:
+        """One long-poll request, False if the server did not answer"""
+        group = self.groups[group_id]
+        assert group.server
         url1 = self._build_query(
-            host=self.server,
+            host=group.server,
             method="",
             params={
                 "act": "a_check",
-                "key": self.key,
-                "ts": self.ts,
-                "wait": 30,
+                "key": group.key,
+                "ts": group.ts,
+                "wait": LONG_POLL_WAIT,
                 "mode": 2,
                 "version": 2,
             },
         )
 
         try:
-            response = await self.session.get(url1, timeout=31)
-            if response.status_code == 200:
-                data = json.loads(response.text)
-                self.logger.info(data)
-                if "failed" in data:
-                    self.logger.error("error: %s", str(data))
-                    if data["failed"] == 1:
-                        self.ts = data["ts"]
-                    else:
-                        await self._get_long_poll_service()
-                    return
-                self.ts = data["ts"]
-                if data.get("updates", []):
-                    updates = await self.form_updates_lst(data)
-                    if updates:
-                        await self.put_updates_to_queue(updates)
-                        # self.worker.start()  # receive_from_queue
-                        # await self.worker.stop()
-                        # self.handle_task = asyncio.create_task(
-                        #     self.app.storage.que.receive_from_queue()
-                        # )
-                        # self.handle_task.add_done_callback(self._done_callback)
-
-        except httpx.ReadTimeout as e:
-            self.logger.error("ReadTimeout %s", url1)
-        except httpx.TimeoutException as e:
+            response = await self._timed(
+                "a_check", self.poll_session.get(url1)
+            )
+            if response.status_code != 200:
+                self.logger.error(
+                    "long-poll answered %s", response.status_code
+                )
+                return False
+            data = codec.loads(response.content)
+            self.logger.info(data)
+            if "failed" in data:
+                self.logger.error("error: %s", str(data))
+                self.metrics.error("a_check", data["failed"])
+                if data["failed"] == 1:
+                    group.ts = data["ts"]
+                    return True
+                if data["failed"] == 2:
+                    # only the key expired, events since ts are kept
+                    ts = group.ts
+                    if not await self._get_long_poll_service(group_id):
+                        return False
+                    group.ts = ts
+                    return True
+                return await self._get_long_poll_service(group_id)
+            if data.get("updates", []):
+                updates = await self.form_updates_lst(data, group_id)
+                if updates:
+                    await self.put_updates_to_queue(updates)
+            group.ts = data["ts"]
+            await self._save_checkpoint(group)
+            return True
+        except httpx.TimeoutException:
             self.logger.error("ReadTimeout %s", url1)
         except Exception as exc:
             self.logger.error("Exception", exc_info=exc)
+        return False
 
     async def send_message(
         self,
         message: Message,
         keyboard: list | None = None,
         photo_id: str | None = None,
-    ) -> None:
-        url = self._build_query(
-            API_PATH,
-            "messages.send",
-            params={
-                "random_id": random.randint(1, 2**32),
-                "peer_id": message.peer_id,
-                "message": message.text,
-                "access_token": self.app.config.bot.token,
-                "attachment": photo_id,
-                "keyboard": (
-                    keyboard if keyboard else json.dumps({"buttons": []})
-                ),  # , json.dumps() "one_time": True, "inline": False
-            },
-        )
+        priority: Priority = Priority.normal,
+    ) -> bool:
+        """False if vk refused the message or did not answer in time"""
+        params = {
+            "random_id": random.randint(1, 2**32),
+            "peer_id": message.peer_id,
+            "message": message.text,
+            "attachment": photo_id,
+            "keyboard": (
+                keyboard if keyboard else EMPTY_KEYBOARD
+            ),  # , json.dumps() "one_time": True, "inline": False
+        }
         try:
-            response = await self.session.get(url)
-            if response.status_code == 200:
-                data = json.loads(response.text)
-                if "failed" in data or "error" in data:
-                    self.logger.error("error: %s", str(data))
-                self.logger.info(data)
-        except httpx.TimeoutException as e:
+            data = await self._call(
+                "messages.send",
+                params=params,
+                priority=priority,
+                group_id=message.group_id,
+            )
+            self.logger.info(data)
+        except VkApiError as exc:
+            self.logger.error("error: %s", exc)
+            return False
+        except httpx.TimeoutException:
             self.logger.error("TimeoutException")
-        except httpx.ReadTimeout as e:
-            self.logger.error("ReadTimeout")
+            return False
+        return True
 
     def _done_callback(self, result: Future) -> None:
         if result.exception():
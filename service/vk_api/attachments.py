@@ -0,0 +1,82 @@
+import asyncio
+import re
+import typing
+from pathlib import Path
+
+if typing.TYPE_CHECKING:
+    from fastapi import FastAPI
+
+# question that is already an attachment id, like photo-228193008_457239018
+ATTACHMENT_ID = re.compile(r"^photo-?\d+_\d+(_\w+)?$")
+# question that is a local image, like photo:hogwarts.jpg
+PHOTO_FILE_PREFIX = "photo:"
+
+
+class PhotoAttachments:
+    """Attachment ids of photo questions. A local image is uploaded
+    once per community, the id is kept with the quiz row and in memory,
+    so a photo round costs only messages.send.
+    """
+
+    def __init__(self, app: "FastAPI") -> None:
+        self.app = app
+        self.photos_dir = Path(app.config.vk_api.photos_dir)
+        self.attachments: dict[tuple[int, int], str] = {}
+        self.in_flight: dict[tuple[int, int], asyncio.Task] = {}
+
+    @property
+    def logger(self):
+        return self.app.config.logger
+
+    @property
+    def vk_api(self):
+        return self.app.storage.vk_api
+
+    async def get(
+        self, question_id: int, question: str, peer_id: int
+    ) -> str | None:
+        """Attachment id for the question, None if it has no photo"""
+        if ATTACHMENT_ID.match(question):
+            return question
+        if not question.startswith(PHOTO_FILE_PREFIX):
+            return None
+        key = (self.vk_api.group().group_id, question_id)
+        attachment = self.attachments.get(key)
+        if attachment:
+            return attachment
+        task = self.in_flight.get(key)
+        if not task:
+            # a detached task: a cancelled caller leaves it to the others
+            task = asyncio.create_task(
+                self._load(
+                    key, question.removeprefix(PHOTO_FILE_PREFIX), peer_id
+                )
+            )
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, key: tuple[int, int], file_name: str, peer_id: int
+    ) -> str | None:
+        try:
+            attachment = await self._resolve(key, file_name, peer_id)
+        except Exception as exc:
+            self.logger.error("photo of %s not uploaded", key, exc_info=exc)
+            return None
+        self.attachments[key] = attachment
+        return attachment
+
+    async def _resolve(
+        self, key: tuple[int, int], file_name: str, peer_id: int
+    ) -> str:
+        group_id, question_id = key
+        game = self.app.storage.game
+        attachment = await game.get_question_attachment(question_id, group_id)
+        if attachment:
+            return attachment
+        attachment = await self.vk_api.upload_message_photo(
+            self.photos_dir / file_name.strip(), peer_id
+        )
+        await game.save_question_attachment(question_id, group_id, attachment)
+        return attachment
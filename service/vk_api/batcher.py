@@ -0,0 +1,118 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from service import codec
+from service.vk_api.rate_limiter import Priority
+
+EXECUTE_MAX_CALLS = 25
+
+
+@dataclass
+class PendingCall:
+    method: str
+    params: dict
+    future: asyncio.Future
+    priority: Priority = Priority.normal
+
+
+class ExecuteBatcher:
+    """Coalesces api calls issued within a short window
+    into one `execute` request (vk allows up to 25 calls in it)
+    """
+
+    def __init__(
+        self,
+        request: Callable[[str, dict, Priority], Awaitable[dict | None]],
+        window: float = 0.05,
+        max_calls: int = EXECUTE_MAX_CALLS,
+    ) -> None:
+        self.request = request
+        self.window = window
+        self.max_calls = max(1, min(max_calls, EXECUTE_MAX_CALLS))
+        self.pending: list[PendingCall] = []
+        self.flush_handle: asyncio.TimerHandle | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+    async def call(
+        self, method: str, params: dict, priority: Priority = Priority.normal
+    ) -> dict | None:
+        """Json body of the api method, as if it was called alone"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append(PendingCall(method, params, future, priority))
+        if len(self.pending) >= self.max_calls:
+            self.flush()
+        elif not self.flush_handle:
+            self.flush_handle = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        task = asyncio.create_task(self._send(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def close(self) -> None:
+        self.flush()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    @staticmethod
+    def build_code(batch: list[PendingCall]) -> str:
+        """VKScript of the calls; None params are left out, as a
+        direct request leaves them out of the form
+        """
+        calls = []
+        for call in batch:
+            params = {
+                key: value
+                for key, value in call.params.items()
+                if value is not None
+            }
+            calls.append(f"API.{call.method}({codec.dumps_str(params)})")
+        return f"return [{','.join(calls)}];"
+
+    @staticmethod
+    def split_response(body: dict | None, size: int) -> list[dict | None]:
+        """One json body per call from the `execute` body"""
+        if body is None or "error" in body:
+            return [body] * size
+        errors = iter(body.get("execute_errors", []))
+        results = []
+        items = body.get("response") or []
+        for i in range(size):
+            item = items[i] if i < len(items) else False
+            if item is False:
+                error = next(errors, {"error_msg": "execute call failed"})
+                results.append({"error": error})
+            else:
+                results.append({"response": item})
+        return results
+
+    async def _send(self, batch: list[PendingCall]) -> None:
+        priority = min(call.priority for call in batch)
+        try:
+            if len(batch) == 1:
+                call = batch[0]
+                results = [
+                    await self.request(call.method, call.params, priority)
+                ]
+            else:
+                body = await self.request(
+                    "execute", {"code": self.build_code(batch)}, priority
+                )
+                results = self.split_response(body, len(batch))
+        except Exception as exc:
+            for call in batch:
+                if not call.future.done():
+                    call.future.set_exception(exc)
+            return
+        for call, result in zip(batch, results):
+            if not call.future.done():
+                call.future.set_result(result)
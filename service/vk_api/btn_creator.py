@@ -1,5 +1,4 @@
-import json
-
+from service import codec
 from service.vk_api.dataclasses import BtnData
 
 
@@ -22,7 +21,7 @@ class BtnCreator:
                 ]
             ],
         }
-        return json.dumps(dict_data)
+        return codec.dumps_str(dict_data)
 
     def get_not_inline_callback_keyboard(
         self, data: list[BtnData], one_time: bool = False
@@ -50,4 +49,4 @@ class BtnCreator:
             "inline": False,
             "buttons": btn_rows,
         }
-        return json.dumps(dict_data)
+        return codec.dumps_str(dict_data)
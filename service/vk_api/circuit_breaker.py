@@ -0,0 +1,66 @@
+import time
+from enum import Enum
+
+from service.vk_api.exceptions import CircuitOpenError
+
+
+class CircuitState(Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` failures in a row and fails fast
+    for `reset_timeout` seconds, then lets one trial call through.
+    A trial without an outcome in `reset_timeout` is replaced by another.
+    """
+
+    def __init__(
+        self, method: str, failure_threshold: int, reset_timeout: float
+    ) -> None:
+        self.method = method
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.closed
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+
+    def before_call(self) -> None:
+        if self.state == CircuitState.closed:
+            return
+        now = time.monotonic()
+        if self.state == CircuitState.open:
+            if now - self.opened_at >= self.reset_timeout:
+                self.state = CircuitState.half_open
+                self.trial_started = now
+                return
+        elif now - self.trial_started >= self.reset_timeout:
+            self.trial_started = now
+            return
+        raise CircuitOpenError(self.method)
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.state = CircuitState.closed
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if (
+            self.state == CircuitState.half_open
+            or self.failures >= self.failure_threshold
+        ):
+            self.state = CircuitState.open
+            self.opened_at = time.monotonic()
+
+    def record_abandoned(self) -> None:
+        """The call ended without an outcome, e.g. it was cancelled:
+        a trial counts as failed, a closed breaker does not change
+        """
+        if self.state == CircuitState.half_open:
+            self.record_failure()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == CircuitState.open
@@ -1,17 +1,15 @@
 from dataclasses import dataclass
 
-from dataclasses_json import dataclass_json
-
 
 @dataclass
 class Message:
     user_id: int
     text: str
     peer_id: int
+    group_id: int | None = None
 
 
-@dataclass_json
-@dataclass
+@dataclass(slots=True)
 class UpdateMessage:
     from_id: int
     text: str
@@ -19,9 +17,27 @@ class UpdateMessage:
     payload: str
     peer_id: int
 
-
-@dataclass_json
-@dataclass
+    @classmethod
+    def from_dict(cls, data: dict) -> "UpdateMessage":
+        return cls(
+            from_id=data["from_id"],
+            text=data["text"],
+            id=data["id"],
+            payload=data.get("payload"),
+            peer_id=data.get("peer_id"),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "from_id": self.from_id,
+            "text": self.text,
+            "id": self.id,
+            "payload": self.payload,
+            "peer_id": self.peer_id,
+        }
+
+
+@dataclass(slots=True)
 class UpdateEventMessage:
     from_id: int
     text: str
@@ -29,26 +45,145 @@ class UpdateEventMessage:
     peer_id: int
     event_id: str
 
-
-@dataclass_json
-@dataclass
+    @classmethod
+    def from_dict(cls, data: dict) -> "UpdateEventMessage":
+        return cls(
+            from_id=data["from_id"],
+            text=data["text"],
+            payload=data.get("payload"),
+            peer_id=data.get("peer_id"),
+            event_id=data.get("event_id"),
+        )
+
+    @classmethod
+    def from_vk(cls, data: dict) -> "UpdateEventMessage":
+        """From `object` of a long-poll message_event"""
+        return cls(
+            from_id=data.get("user_id"),
+            text="",
+            payload=data.get("payload"),
+            peer_id=data.get("peer_id"),
+            event_id=data.get("event_id"),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "from_id": self.from_id,
+            "text": self.text,
+            "payload": self.payload,
+            "peer_id": self.peer_id,
+            "event_id": self.event_id,
+        }
+
+
+@dataclass(slots=True)
 class UpdateObject:
     message: UpdateMessage | UpdateEventMessage
 
 
-@dataclass_json
-@dataclass
+@dataclass(slots=True)
 class Update:
     type: str
     object: UpdateObject
-
-
-@dataclass_json
-@dataclass
+    group_id: int | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Update":
+        """From the queue message"""
+        message = data["object"]["message"]
+        return cls(
+            type=data["type"],
+            object=UpdateObject(
+                message=(
+                    UpdateEventMessage.from_dict(message)
+                    if data["type"] == "message_event"
+                    else UpdateMessage.from_dict(message)
+                )
+            ),
+            group_id=data.get("group_id"),
+        )
+
+    @classmethod
+    def from_vk(cls, update: dict, group_id: int | None = None) -> "Update":
+        """From the raw long-poll or callback update"""
+        if update["type"] == "message_event":
+            message = UpdateEventMessage.from_vk(update["object"])
+        else:
+            message = UpdateMessage.from_dict(update["object"]["message"])
+        return cls(
+            type=update["type"],
+            object=UpdateObject(message=message),
+            group_id=group_id,
+        )
+
+    @property
+    def peer_id(self) -> int:
+        return self.object.message.peer_id
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type,
+            "object": {"message": self.object.message.to_dict()},
+            "group_id": self.group_id,
+        }
+
+
+@dataclass(slots=True)
 class ChatInvite:
+    """A member joined (chat_invite_user) or left (chat_kick_user)"""
+
     type: str
     peer_id: int
     member_id: int
+    group_id: int | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChatInvite":
+        return cls(
+            type=data["type"],
+            peer_id=data["peer_id"],
+            member_id=data["member_id"],
+            group_id=data.get("group_id"),
+        )
+
+    @classmethod
+    def from_vk(
+        cls, update: dict, group_id: int | None = None
+    ) -> "ChatInvite":
+        """From the raw message_new with an invite or kick action"""
+        message = update["object"]["message"]
+        action = message["action"]
+        return cls(
+            type=(
+                "chat_kick_user"
+                if action["type"] == "chat_kick_user"
+                else "chat_invite_user"
+            ),
+            peer_id=message.get("peer_id"),
+            member_id=(
+                action.get("member_id", message["from_id"])
+                if action["type"] in ("chat_invite_user", "chat_kick_user")
+                else message["from_id"]
+            ),
+            group_id=group_id,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type,
+            "peer_id": self.peer_id,
+            "member_id": self.member_id,
+            "group_id": self.group_id,
+        }
+
+
+def parse_update(data: dict) -> Update | ChatInvite | None:
+    """Typed update from the queue message"""
+    if data["type"] in ("chat_invite_user", "chat_kick_user"):
+        return ChatInvite.from_dict(data)
+    if data["type"] in ("message_new", "message_event"):
+        return Update.from_dict(data)
+    return None
 
 
 @dataclass
@@ -0,0 +1,133 @@
+import asyncio
+import time
+import typing
+from asyncio import Queue, Task
+from collections import deque
+from dataclasses import dataclass, field
+
+from service.vk_api.dataclasses import Message
+from service.vk_api.rate_limiter import Priority
+
+if typing.TYPE_CHECKING:
+    from fastapi import FastAPI
+
+
+@dataclass
+class OutgoingMessage:
+    message: Message
+    keyboard: str | list | None = None
+    photo_id: str | None = None
+    priority: Priority = Priority.normal
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class DispatcherStats:
+    queue_depth: int
+    sent: int
+    failed: int
+    latency_avg: float
+    latency_p95: float
+    latency_max: float
+
+
+class MessageDispatcher:
+    """Handlers enqueue messages, sender coroutines deliver them.
+    A peer of a community is always served by the same sender,
+    so its messages keep their order.
+    """
+
+    def __init__(self, app: "FastAPI") -> None:
+        self.app = app
+        self.workers_amount = max(1, app.config.vk_api.dispatcher_workers)
+        self.queue_size = app.config.vk_api.dispatcher_queue_size
+        self.queues: list[Queue[OutgoingMessage]] = []
+        self.tasks: list[Task] = []
+        self.is_running = False
+        self.sent = 0
+        self.failed = 0
+        self.latencies: deque[float] = deque(maxlen=1000)
+        self.latency_max = 0.0
+
+    @property
+    def logger(self):
+        return self.app.config.logger
+
+    @property
+    def vk_api(self):
+        return self.app.storage.vk_api
+
+    def start(self) -> None:
+        self.is_running = True
+        self.queues = [
+            Queue(maxsize=self.queue_size) for _ in range(self.workers_amount)
+        ]
+        self.tasks = [
+            asyncio.create_task(self.sender(queue)) for queue in self.queues
+        ]
+
+    async def stop(self) -> None:
+        """Deliver what is already queued, then stop senders"""
+        self.is_running = False
+        for queue in self.queues:
+            await queue.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def send_message(
+        self,
+        message: Message,
+        keyboard: str | list | None = None,
+        photo_id: str | None = None,
+        priority: Priority = Priority.normal,
+    ) -> None:
+        if not self.is_running:
+            await self.vk_api.send_message(
+                message,
+                keyboard=keyboard,
+                photo_id=photo_id,
+                priority=priority,
+            )
+            return
+        key = hash((message.group_id, message.peer_id))
+        queue = self.queues[key % len(self.queues)]
+        await queue.put(OutgoingMessage(message, keyboard, photo_id, priority))
+
+    async def sender(self, queue: Queue[OutgoingMessage]) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if await self.vk_api.send_message(
+                    item.message,
+                    keyboard=item.keyboard,
+                    photo_id=item.photo_id,
+                    priority=item.priority,
+                ):
+                    self.sent += 1
+                else:
+                    self.failed += 1
+            except Exception as exc:
+                self.failed += 1
+                self.logger.error("message not sent", exc_info=exc)
+            finally:
+                latency = time.monotonic() - item.enqueued
+                self.latencies.append(latency)
+                self.latency_max = max(self.latency_max, latency)
+                queue.task_done()
+
+    def stats(self) -> DispatcherStats:
+        latencies = sorted(self.latencies)
+        return DispatcherStats(
+            queue_depth=sum(queue.qsize() for queue in self.queues),
+            sent=self.sent,
+            failed=self.failed,
+            latency_avg=(
+                sum(latencies) / len(latencies) if latencies else 0.0
+            ),
+            latency_p95=(
+                latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+            ),
+            latency_max=self.latency_max,
+        )
@@ -0,0 +1,45 @@
+import httpx
+
+# 1 unknown error, 6 too many requests per second, 10 internal server error
+RETRYABLE_CODES = frozenset({1, 6, 10})
+# 5 authorization failed, 9 flood control, 29 rate limit reached
+TOKEN_CODES = frozenset({5, 9, 29})
+
+
+class VkApiError(Exception):
+    def __init__(self, method: str, error: dict | None = None):
+        error = error or {}
+        self.method = method
+        self.code: int | None = error.get("error_code")
+        self.error_msg: str = error.get("error_msg", "")
+        super().__init__(f"{method}: [{self.code}] {self.error_msg}")
+
+
+class VkHttpError(VkApiError):
+    def __init__(self, method: str, status_code: int):
+        super().__init__(method, {"error_msg": f"http status {status_code}"})
+        self.status_code = status_code
+
+
+class CircuitOpenError(VkApiError):
+    def __init__(self, method: str):
+        super().__init__(method, {"error_msg": "circuit breaker is open"})
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, VkHttpError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    if isinstance(exc, VkApiError):
+        return exc.code in RETRYABLE_CODES
+    return isinstance(exc, httpx.TimeoutException | httpx.NetworkError)
+
+
+def is_token_error(exc: BaseException) -> bool:
+    """The token is at fault, another one of the pool may succeed"""
+    return (
+        isinstance(exc, VkApiError)
+        and not isinstance(exc, VkHttpError)
+        and exc.code in TOKEN_CODES
+    )
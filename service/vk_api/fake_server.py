@@ -0,0 +1,292 @@
+"""Stand-in for the VK api and long-poll server, for load tests offline.
+
+    python -m service.vk_api.fake_server --port 8081 --rate 50 --chats 100
+
+and point the bot at it in config.yml:
+
+    vk_api:
+      api_path: http://127.0.0.1:8081/method/
+
+Answers groups.getLongPollServer, the long-poll `a_check`, messages.send,
+users.get, messages.getConversationMembers,
+messages.sendMessageEventAnswer and `execute` batches of them.
+Inbound traffic is generated at `--rate` messages per second and/or
+played from a `--script` file, json lines of updates with an optional
+`delay` in seconds before each. Calls counted per method are at /stats.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from service import codec
+
+CHAT_PEER_ID = 2_000_000_000
+HISTORY_SIZE = 10_000
+LONG_POLL_MAX_WAIT = 90
+FIRST_NAMES = ("Анна", "Иван", "Мария", "Пётр", "Ольга", "Сергей")
+EXECUTE_CALL = re.compile(r"API\.([\w.]+)\(")
+
+TOO_MANY_REQUESTS = {
+    "error_code": 6,
+    "error_msg": "Too many requests per second",
+}
+UNKNOWN_METHOD = {"error_code": 3, "error_msg": "Unknown method passed"}
+
+
+@dataclass
+class FakeVkConfig:
+    host: str = "127.0.0.1"
+    port: int = 8081
+    group_id: int = 1
+    latency: float = 0.0  # mean seconds added to every api request
+    error_rate: float = 0.0  # share of calls answered with error 6
+    chats: int = 10
+    users_per_chat: int = 5
+    rate: float = 0.0  # generated inbound messages per second
+    texts: list[str] = field(default_factory=lambda: ["/start"])
+    script: str | None = None
+
+
+class FakeVk:
+    """State of the stand-in: long-poll event history, users of
+    generated chats and counters of calls
+    """
+
+    def __init__(self, config: FakeVkConfig) -> None:
+        self.config = config
+        self.events: list[dict] = []
+        self.first_ts = 1
+        self.new_events = asyncio.Condition()
+        self.calls: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.message_ids = itertools.count(1)
+        self.event_ids = itertools.count(1)
+        self.methods = {
+            "groups.getLongPollServer": self.get_long_poll_server,
+            "messages.send": self.send_message,
+            "messages.sendMessageEventAnswer": lambda params: 1,
+            "messages.getConversationMembers": self.get_conversation_members,
+            "users.get": self.get_users,
+        }
+
+    @property
+    def ts(self) -> int:
+        return self.first_ts + len(self.events)
+
+    def chat_members(self, peer_id: int) -> list[int]:
+        first = (peer_id - CHAT_PEER_ID) * self.config.users_per_chat
+        return list(range(first + 1, first + self.config.users_per_chat + 1))
+
+    @staticmethod
+    def user(user_id: int) -> dict:
+        return {
+            "id": user_id,
+            "first_name": FIRST_NAMES[user_id % len(FIRST_NAMES)],
+            "last_name": f"User{user_id}",
+        }
+
+    def get_long_poll_server(self, params: dict) -> dict:
+        return {
+            "key": "fake",
+            "server": f"http://{self.config.host}:{self.config.port}/lp",
+            "ts": str(self.ts),
+        }
+
+    def send_message(self, params: dict) -> int:
+        return next(self.message_ids)
+
+    def get_conversation_members(self, params: dict) -> dict:
+        members = self.chat_members(int(params["peer_id"]))
+        return {
+            "count": len(members),
+            "items": [{"member_id": member_id} for member_id in members],
+            "profiles": [self.user(member_id) for member_id in members],
+        }
+
+    def get_users(self, params: dict) -> list[dict]:
+        user_ids = str(params.get("user_ids", "")).split(",")
+        return [self.user(int(user_id)) for user_id in user_ids if user_id]
+
+    def call(self, method: str, params: dict) -> dict:
+        """Json body of one api method"""
+        self.calls[method] += 1
+        if random.random() < self.config.error_rate:
+            self.errors[method] += 1
+            return {"error": TOO_MANY_REQUESTS}
+        handler = self.methods.get(method)
+        if not handler:
+            self.errors[method] += 1
+            return {"error": UNKNOWN_METHOD}
+        return {"response": handler(params)}
+
+    def execute(self, code: str) -> dict:
+        """Runs `return [API.method({...}),...];` as built by the batcher"""
+        self.calls["execute"] += 1
+        decoder = json.JSONDecoder()
+        response, errors = [], []
+        for match in EXECUTE_CALL.finditer(code):
+            params, _ = decoder.raw_decode(code, match.end())
+            body = self.call(match.group(1), params)
+            if "error" in body:
+                response.append(False)
+                errors.append({"method": match.group(1), **body["error"]})
+            else:
+                response.append(body["response"])
+        json_body = {"response": response}
+        if errors:
+            json_body["execute_errors"] = errors
+        return json_body
+
+    async def publish(self, update: dict) -> None:
+        update.setdefault("group_id", self.config.group_id)
+        update.setdefault("event_id", f"fake{next(self.event_ids)}")
+        async with self.new_events:
+            self.events.append(update)
+            if len(self.events) > HISTORY_SIZE:
+                dropped = len(self.events) - HISTORY_SIZE
+                del self.events[:dropped]
+                self.first_ts += dropped
+            self.new_events.notify_all()
+
+    async def a_check(self, ts: int, wait: float) -> dict:
+        if ts < self.first_ts or ts > self.ts:
+            return {"failed": 1, "ts": str(self.ts)}
+        async with self.new_events:
+            try:
+                await asyncio.wait_for(
+                    self.new_events.wait_for(lambda: self.ts > ts),
+                    timeout=min(wait, LONG_POLL_MAX_WAIT),
+                )
+            except asyncio.TimeoutError:
+                pass
+            updates = self.events[ts - self.first_ts :]
+        return {"ts": str(self.ts), "updates": updates}
+
+    def message_new(self, peer_id: int, from_id: int, text: str) -> dict:
+        return {
+            "type": "message_new",
+            "object": {
+                "message": {
+                    "id": next(self.message_ids),
+                    "from_id": from_id,
+                    "peer_id": peer_id,
+                    "text": text,
+                },
+                "client_info": {},
+            },
+        }
+
+    async def generate(self) -> None:
+        """Messages of random users in random chats, poisson arrivals"""
+        while True:
+            await asyncio.sleep(random.expovariate(self.config.rate))
+            peer_id = CHAT_PEER_ID + random.randint(1, self.config.chats)
+            await self.publish(
+                self.message_new(
+                    peer_id,
+                    random.choice(self.chat_members(peer_id)),
+                    random.choice(self.config.texts),
+                )
+            )
+
+    async def play_script(self, path: Path) -> None:
+        for line in path.read_text().splitlines():
+            if not line.strip():
+                continue
+            update = codec.loads(line)
+            await asyncio.sleep(update.pop("delay", 0))
+            await self.publish(update)
+
+    async def delay(self) -> None:
+        if self.config.latency > 0:
+            await asyncio.sleep(self.config.latency * random.uniform(0.5, 1.5))
+
+
+def make_app(fake: FakeVk) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        tasks = []
+        if fake.config.rate > 0:
+            tasks.append(asyncio.create_task(fake.generate()))
+        if fake.config.script:
+            tasks.append(
+                asyncio.create_task(fake.play_script(Path(fake.config.script)))
+            )
+        yield
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    app = FastAPI(title="fake vk", lifespan=lifespan)
+    app.state.fake = fake
+
+    @app.api_route("/method/{method}", methods=["GET", "POST"])
+    async def method_handler(method: str, request: Request) -> Response:
+        params = dict(request.query_params)
+        params.update(parse_qsl((await request.body()).decode()))
+        await fake.delay()
+        if method == "execute":
+            json_body = fake.execute(params.get("code", ""))
+        else:
+            json_body = fake.call(method, params)
+        return Response(codec.dumps(json_body), media_type="application/json")
+
+    @app.get("/lp")
+    async def long_poll_handler(ts: int, wait: float = 25) -> Response:
+        json_body = await fake.a_check(ts, wait)
+        return Response(codec.dumps(json_body), media_type="application/json")
+
+    @app.get("/stats")
+    async def stats_handler() -> dict:
+        return {
+            "calls": fake.calls,
+            "errors": fake.errors,
+            "ts": fake.ts,
+        }
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    defaults = FakeVkConfig()
+    parser.add_argument("--host", default=defaults.host)
+    parser.add_argument("--port", type=int, default=defaults.port)
+    parser.add_argument("--group-id", type=int, default=defaults.group_id)
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument(
+        "--error-rate", type=float, default=defaults.error_rate
+    )
+    parser.add_argument("--chats", type=int, default=defaults.chats)
+    parser.add_argument(
+        "--users-per-chat", type=int, default=defaults.users_per_chat
+    )
+    parser.add_argument("--rate", type=float, default=defaults.rate)
+    parser.add_argument("--text", dest="texts", action="append")
+    parser.add_argument("--script")
+    args = parser.parse_args()
+    config = FakeVkConfig(
+        **{
+            key: value
+            for key, value in vars(args).items()
+            if value is not None
+        }
+    )
+    uvicorn.run(make_app(FakeVk(config)), host=config.host, port=config.port)
+
+
+if __name__ == "__main__":
+    main()
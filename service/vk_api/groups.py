@@ -0,0 +1,26 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from service.vk_api.batcher import ExecuteBatcher
+from service.vk_api.poller import Poller
+from service.vk_api.token_pool import TokenPool
+
+# community of the update being handled, replies go out with its token
+current_group_id: ContextVar[int | None] = ContextVar(
+    "current_group_id", default=None
+)
+
+
+@dataclass
+class GroupSession:
+    """Outbound tokens and long-poll state of one community"""
+
+    group_id: int
+    tokens: TokenPool
+    batcher: ExecuteBatcher | None = None
+    key: str | None = None
+    server: str | None = None
+    ts: str | None = None
+    saved_ts: str | None = None
+    resumed: bool = False
+    poller: Poller | None = None
@@ -0,0 +1,39 @@
+from service.dataclasses import UserDto
+from service.vk_api.cache import TTLCache
+
+
+class ConversationMembersCache:
+    """Members of chats by community and peer_id. Kept up to date from
+    invite and kick events, ttl only guards against missed events.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.cache: TTLCache[tuple[int, int], dict[int, UserDto]] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+
+    def get(self, group_id: int, peer_id: int) -> list[UserDto] | None:
+        members = self.cache.get((group_id, peer_id))
+        if members is None:
+            return None
+        return list(members.values())
+
+    def set(self, group_id: int, peer_id: int, members: list[UserDto]) -> None:
+        self.cache.set(
+            (group_id, peer_id), {member.vk_id: member for member in members}
+        )
+
+    def add_member(self, group_id: int, peer_id: int, member: UserDto) -> None:
+        members = self.cache.get((group_id, peer_id))
+        if members is not None:
+            members[member.vk_id] = member
+
+    def remove_member(
+        self, group_id: int, peer_id: int, member_id: int
+    ) -> None:
+        members = self.cache.get((group_id, peer_id))
+        if members is not None:
+            members.pop(member_id, None)
+
+    def invalidate(self, group_id: int, peer_id: int) -> None:
+        self.cache.pop((group_id, peer_id))
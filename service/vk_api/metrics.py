@@ -0,0 +1,109 @@
+from bisect import bisect_left
+from collections import Counter
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(le, count) pairs, the last one is +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+
+class ApiMetrics:
+    """Latency and outcomes of vk api requests by method,
+    rendered in prometheus text format
+    """
+
+    def __init__(self) -> None:
+        # http round trips, `execute` for batches, `a_check` for long-poll
+        self.requests: dict[str, Histogram] = {}
+        # method calls as seen by callers: batching window and retries
+        self.calls: dict[str, Histogram] = {}
+        self.errors: Counter[tuple[str, str]] = Counter()
+        self.http_status: Counter[tuple[str, int]] = Counter()
+        self.timeouts: Counter[str] = Counter()
+
+    @staticmethod
+    def _observe(histograms: dict[str, Histogram], method: str, value: float):
+        histogram = histograms.get(method)
+        if not histogram:
+            histogram = histograms[method] = Histogram()
+        histogram.observe(value)
+
+    def observe_request(self, method: str, seconds: float) -> None:
+        self._observe(self.requests, method, seconds)
+
+    def observe_call(self, method: str, seconds: float) -> None:
+        self._observe(self.calls, method, seconds)
+
+    def error(self, method: str, code: int | str | None) -> None:
+        self.errors[method, str(code)] += 1
+
+    def status(self, method: str, status_code: int) -> None:
+        self.http_status[method, status_code] += 1
+
+    def timeout(self, method: str) -> None:
+        self.timeouts[method] += 1
+
+    def render(self) -> str:
+        lines = []
+        for name, histograms, help_ in (
+            (
+                "vk_api_request_seconds",
+                self.requests,
+                "Http round trip to vk api",
+            ),
+            (
+                "vk_api_call_seconds",
+                self.calls,
+                "Api method call with batching and retries",
+            ),
+        ):
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} histogram")
+            for method, histogram in sorted(histograms.items()):
+                for le, count in histogram.cumulative():
+                    lines.append(
+                        f'{name}_bucket{{method="{method}",le="{le}"}} {count}'
+                    )
+                lines.append(
+                    f'{name}_sum{{method="{method}"}} {histogram.sum}'
+                )
+                lines.append(
+                    f'{name}_count{{method="{method}"}} {histogram.count}'
+                )
+        lines.append("# HELP vk_api_errors_total Vk errors by code")
+        lines.append("# TYPE vk_api_errors_total counter")
+        for (method, code), count in sorted(self.errors.items()):
+            lines.append(
+                f'vk_api_errors_total{{method="{method}",code="{code}"}} {count}'
+            )
+        lines.append("# HELP vk_api_http_responses_total Responses by status")
+        lines.append("# TYPE vk_api_http_responses_total counter")
+        for (method, status_code), count in sorted(self.http_status.items()):
+            lines.append(
+                "vk_api_http_responses_total"
+                f'{{method="{method}",status="{status_code}"}} {count}'
+            )
+        lines.append("# HELP vk_api_timeouts_total Requests that timed out")
+        lines.append("# TYPE vk_api_timeouts_total counter")
+        for method, count in sorted(self.timeouts.items()):
+            lines.append(f'vk_api_timeouts_total{{method="{method}"}} {count}')
+        return "\n".join(lines) + "\n"
@@ -1,17 +1,35 @@
 import asyncio
+import random
+import time
 import typing
 from asyncio import Future, Task
-
+from enum import Enum
 
 if typing.TYPE_CHECKING:
     from fastapi import FastAPI
 
 
+class PollerHealth(str, Enum):
+    healthy = "healthy"
+    degraded = "degraded"
+    down = "down"
+
+
 class Poller:
-    def __init__(self, app: "FastAPI") -> None:
+    """Long-poll loop of one community. Failed polls are retried
+    with exponential backoff and jitter, health shows how many
+    failed in a row.
+    """
+
+    def __init__(self, app: "FastAPI", group_id: int) -> None:
         self.app = app
+        self.group_id = group_id
+        self.config = app.config.vk_api
         self.is_running = False
         self.poll_task: Task | None = None
+        self.restart_handle: asyncio.TimerHandle | None = None
+        self.failures = 0
+        self.last_success: float | None = None
 
     @property
     def logger(self):
@@ -21,29 +39,70 @@ class Poller:
     def vk_api(self):
         return self.app.storage.vk_api
 
+    @property
+    def health(self) -> PollerHealth:
+        if self.failures == 0:
+            return PollerHealth.healthy
+        if self.failures < self.config.poller_down_after:
+            return PollerHealth.degraded
+        return PollerHealth.down
+
+    def backoff(self) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(
+            0,
+            min(
+                self.config.poller_backoff_max,
+                self.config.poller_backoff_base * 2 ** (self.failures - 1),
+            ),
+        )
+
     def _done_callback(self, result: Future) -> None:
+        if result.cancelled():
+            return
         if result.exception():
             self.logger.exception(
                 "poller stopped with exception", exc_info=result.exception()
             )
-            self.is_running = False  # my, needed?
+            self.failures += 1
         if self.is_running:
-            self.start()
+            self.restart_handle = asyncio.get_running_loop().call_later(
+                self.backoff(), self.start
+            )
 
     def start(self) -> None:
         self.is_running = True
+        self.restart_handle = None
 
         self.poll_task = asyncio.create_task(self.poll())
         self.poll_task.add_done_callback(self._done_callback)
 
     async def stop(self) -> None:
+        """Stops at once, a long-poll request in flight is cancelled"""
         self.is_running = False
-
-        await self.poll_task
+        if self.restart_handle:
+            self.restart_handle.cancel()
+            self.restart_handle = None
+        if self.poll_task:
+            self.poll_task.cancel()
+            await asyncio.gather(self.poll_task, return_exceptions=True)
 
     async def poll(self) -> None:
         while self.is_running:
-            if self.vk_api.server:
-                await self.vk_api.poll()
+            if self.vk_api.groups[self.group_id].server:
+                success = await self.vk_api.poll(self.group_id)
             else:
-                await asyncio.sleep(1)
+                success = await self.vk_api.connect_long_poll(self.group_id)
+            if success:
+                self.failures = 0
+                self.last_success = time.monotonic()
+                continue
+            self.failures += 1
+            delay = self.backoff()
+            self.logger.warning(
+                "long-poll of group %s failed %s times, next try in %.1fs",
+                self.group_id,
+                self.failures,
+                delay,
+            )
+            await asyncio.sleep(delay)
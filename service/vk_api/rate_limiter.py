@@ -0,0 +1,78 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Lower value is served first"""
+
+    high = 0
+    normal = 1
+    low = 2
+
+
+class RateLimiter:
+    """Token bucket for outbound api requests,
+    waiting requests are released in priority order
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.waiters: list[tuple[int, int, asyncio.Future]] = []
+        self.counter = itertools.count()
+        self.wake_handle: asyncio.TimerHandle | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    async def acquire(self, priority: Priority = Priority.normal) -> None:
+        if self.rate <= 0:
+            return
+        self._refill()
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.counter), future))
+        self._schedule()
+        await future
+
+    def _schedule(self) -> None:
+        if self.wake_handle or not self.waiters:
+            return
+        delay = max(0.0, (1 - self.tokens) / self.rate)
+        self.wake_handle = asyncio.get_running_loop().call_later(
+            delay, self._wake
+        )
+
+    def _wake(self) -> None:
+        self.wake_handle = None
+        self._refill()
+        while self.waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self.waiters)
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+        self._schedule()
+
+    @property
+    def available(self) -> float:
+        """Tokens left after the requests already waiting"""
+        if self.rate <= 0:
+            return float(self.burst)
+        self._refill()
+        return self.tokens - len(self.waiters)
+
+    @property
+    def waiting(self) -> int:
+        return len(self.waiters)
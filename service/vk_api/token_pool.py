@@ -0,0 +1,48 @@
+import itertools
+import time
+from dataclasses import dataclass, field
+
+from service.vk_api.rate_limiter import RateLimiter
+
+
+@dataclass
+class PooledToken:
+    token: str
+    rate_limiter: RateLimiter
+    base_params: dict = field(default_factory=dict)
+    suspended_until: float = 0.0
+
+    @property
+    def is_active(self) -> bool:
+        return time.monotonic() >= self.suspended_until
+
+
+class TokenPool:
+    """Access tokens of one community, each with its own rate limit.
+    Calls go round-robin, preferring the token with the most budget
+    left; tokens that failed auth or hit flood control sit out
+    for `suspend_time` seconds.
+    """
+
+    def __init__(self, tokens: list[PooledToken], suspend_time: float) -> None:
+        self.tokens = tokens
+        self.suspend_time = suspend_time
+        self.counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def active(self) -> int:
+        return sum(token.is_active for token in self.tokens)
+
+    def pick(self) -> PooledToken:
+        start = next(self.counter) % len(self.tokens)
+        ordered = self.tokens[start:] + self.tokens[:start]
+        active = [token for token in ordered if token.is_active]
+        if not active:
+            return min(ordered, key=lambda token: token.suspended_until)
+        return max(active, key=lambda token: token.rate_limiter.available)
+
+    def suspend(self, token: PooledToken) -> None:
+        token.suspended_until = time.monotonic() + self.suspend_time
@@ -0,0 +1,107 @@
+import asyncio
+import typing
+
+from service.dataclasses import UserDto
+from service.vk_api.cache import TTLCache
+
+if typing.TYPE_CHECKING:
+    from fastapi import FastAPI
+
+USERS_GET_MAX_IDS = 1000
+
+
+class UserDirectory:
+    """Cache of user names in front of users.get and the user table.
+    Misses of one loop iteration are resolved with one bulk users.get,
+    concurrent lookups of the same id share one request.
+    """
+
+    def __init__(self, app: "FastAPI") -> None:
+        self.app = app
+        self.cache: TTLCache[int, UserDto] = TTLCache(
+            maxsize=app.config.vk_api.user_cache_size,
+            ttl=app.config.vk_api.user_cache_ttl,
+        )
+        self.in_flight: dict[int, asyncio.Future] = {}
+        self.pending_ids: list[int] = []
+        self.flush_handle: asyncio.Handle | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+    @property
+    def logger(self):
+        return self.app.config.logger
+
+    @property
+    def vk_api(self):
+        return self.app.storage.vk_api
+
+    def put(self, user: UserDto) -> None:
+        if user:
+            self.cache.set(user.vk_id, user)
+
+    def put_many(self, users: list[UserDto]) -> None:
+        for user in users or []:
+            self.put(user)
+
+    async def get(self, vk_id: int | None) -> UserDto | None:
+        if not vk_id:
+            return None
+        vk_id = int(vk_id)
+        user = self.cache.get(vk_id)
+        if user:
+            return user
+        future = self.in_flight.get(vk_id)
+        if not future:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.in_flight[vk_id] = future
+            self.pending_ids.append(vk_id)
+            if not self.flush_handle:
+                self.flush_handle = loop.call_soon(self._flush)
+        return await asyncio.shield(future)
+
+    async def get_many(self, vk_ids: list[int]) -> list[UserDto]:
+        users = await asyncio.gather(*(self.get(vk_id) for vk_id in vk_ids))
+        return [user for user in users if user]
+
+    def _flush(self) -> None:
+        self.flush_handle = None
+        ids, self.pending_ids = self.pending_ids, []
+        for i in range(0, len(ids), USERS_GET_MAX_IDS):
+            task = asyncio.create_task(
+                self._resolve(ids[i : i + USERS_GET_MAX_IDS])
+            )
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _resolve(self, ids: list[int]) -> None:
+        try:
+            users = {
+                user.vk_id: user
+                for user in await self.vk_api.get_users_info(ids)
+            }
+            for vk_id in ids:
+                if vk_id not in users:
+                    users[vk_id] = await self._get_from_db(vk_id)
+        except Exception as exc:
+            for vk_id in ids:
+                future = self.in_flight.pop(vk_id)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for vk_id in ids:
+            user = users.get(vk_id)
+            self.put(user)
+            future = self.in_flight.pop(vk_id)
+            if not future.done():
+                future.set_result(user)
+
+    async def _get_from_db(self, vk_id: int) -> UserDto | None:
+        user = await self.app.storage.user.get_user(id_=None, vk_id=vk_id)
+        if not user:
+            return None
+        return UserDto(
+            vk_id=user.vk_id,
+            first_name=user.first_name,
+            second_name=user.second_name,
+        )
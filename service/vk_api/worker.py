@@ -32,6 +32,7 @@ class Worker:
         # if self.work_task:
         #     self.work_task.cancel()
         if self.work_task:
+            await self.queue.stop_consuming()
             await self.work_task
 
     def _done_callback(self, result: Future) -> None:
@@ -2,11 +2,40 @@ from unittest.mock import AsyncMock
 
 import pytest
 
-from service.config import Storage
+from service.__main__ import app
+from service.config import GroupConfig, Storage
+from service.vk_api.accessor import VkApiAccessor
 
 
 @pytest.fixture
-def vk_api_send_message_mock(storage: Storage) -> AsyncMock:
+def storage() -> Storage:
+    return app.storage
+
+
+@pytest.fixture
+def vk_api_send_message_mock(
+    storage: Storage, monkeypatch: pytest.MonkeyPatch
+) -> AsyncMock:
     mock = AsyncMock()
-    storage.vk_api.send_message = mock
+    monkeypatch.setattr(storage.vk_api, "send_message", mock)
     return mock
+
+
+@pytest.fixture
+def vk_api(storage: Storage, monkeypatch: pytest.MonkeyPatch) -> VkApiAccessor:
+    """Calls go straight to `_request`, through fresh breakers and
+    a fresh pool of two tokens of the main community
+    """
+    vk_api = storage.vk_api
+    group = vk_api.group()
+    monkeypatch.setattr(vk_api.config, "retry_base_delay", 0)
+    monkeypatch.setattr(vk_api, "breakers", {})
+    monkeypatch.setattr(group, "batcher", None)
+    monkeypatch.setattr(
+        group,
+        "tokens",
+        vk_api._make_token_pool(
+            GroupConfig("token-a", group.group_id, tokens=["token-b"])
+        ),
+    )
+    return vk_api
@@ -4,6 +4,7 @@ import pytest
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from service.__main__ import app
 from service.db_setup.models import (
     GameModel,
     ParticipantModel,
@@ -35,7 +36,7 @@ async def fill_db_for_test(
 ):
     models_to_add = [
         # UserModel(first_name="user_for_test2", second_name="bbb", vk_id=123),
-        GameModel(chat_id=9999),
+        GameModel(group_id=app.config.bot.group_id, chat_id=9999),
         ParticipantModel(game_id=1, user_id=1, score=0),
         QuizModel(question="qq", answer="aaa", category="common", price=200),
         QuizModel(question="qq2", answer="aaa2", category="common", price=100),
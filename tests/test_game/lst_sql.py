@@ -5,8 +5,8 @@ lst = [
         ;
         """,
     """insert into public.game
-            (chat_id)
-            values (5);
+            (group_id, chat_id)
+            values (2, 5);
         ;
         """,
     # """insert into public.participant
@@ -0,0 +1,117 @@
+import copy
+
+import pytest
+
+from service.rabbitmq_service import envelope
+from service.vk_api.dataclasses import (
+    ChatInvite,
+    Update,
+    UpdateEventMessage,
+    UpdateMessage,
+    UpdateObject,
+)
+
+pytestmark = pytest.mark.asyncio
+
+UPDATES = [
+    Update(
+        type="message_new",
+        object=UpdateObject(
+            UpdateMessage(
+                from_id=1234567,
+                text="Ответ на вопрос викторины",
+                id=123,
+                payload='{"btn": "ready"}',
+                peer_id=2000000001,
+            )
+        ),
+        group_id=1,
+    ),
+    Update(
+        type="message_event",
+        object=UpdateObject(
+            UpdateEventMessage(
+                from_id=1234567,
+                text="",
+                payload={"btn": "choose_price", "price": 100},
+                peer_id=2000000001,
+                event_id="e7f0a1",
+            )
+        ),
+        group_id=1,
+    ),
+    ChatInvite(
+        type="chat_invite_user", peer_id=2000000001, member_id=7, group_id=1
+    ),
+    ChatInvite(
+        type="chat_kick_user", peer_id=2000000001, member_id=7, group_id=1
+    ),
+]
+
+
+class TestEnvelope:
+    @pytest.mark.parametrize("update", UPDATES)
+    async def test_round_trip(self, update) -> None:
+        """Обновление переживает упаковку в конверт без потерь"""
+        message = envelope.encode(update)
+        assert message.headers[envelope.SCHEMA_HEADER] == 2
+        assert envelope.decode(message) == update
+
+    @pytest.mark.parametrize("update", UPDATES)
+    async def test_msgpack(self, update) -> None:
+        """Вторая версия упаковывается msgpack"""
+        message = envelope.encode(update)
+        assert message.content_type == envelope.MSGPACK
+        assert envelope.msgpack.unpackb(message.body) == envelope.to_row(
+            update
+        )
+        assert envelope.decode(message) == update
+
+    @pytest.mark.parametrize("update", UPDATES)
+    async def test_json_fallback(self, update, monkeypatch) -> None:
+        """Без msgpack конверт упаковывается в json и читается"""
+        monkeypatch.setattr(envelope, "msgpack", None)
+        message = envelope.encode(update)
+        assert message.content_type == envelope.JSON
+        assert envelope.decode(message) == update
+
+    @pytest.mark.parametrize("update", UPDATES)
+    async def test_old_version_readable(self, update) -> None:
+        """Сообщения первой версии читаются новыми воркерами"""
+        message = envelope.encode(update, version=1)
+        assert not message.headers
+        assert envelope.decode(message) == update
+
+    async def test_smaller(self) -> None:
+        """Вторая версия меньше json-объекта первой"""
+        for update in UPDATES:
+            compact = envelope.encode(update).body
+            assert len(compact) < len(envelope.encode(update, version=1).body)
+
+    async def test_compressed_above_threshold(self) -> None:
+        """Большие сообщения сжимаются"""
+        update = copy.deepcopy(UPDATES[0])
+        update.object.message.text = "ответ " * 500
+        message = envelope.encode(update, compress_above=1024)
+        assert message.content_encoding == envelope.DEFLATE
+        assert len(message.body) < 1024
+        assert envelope.decode(message) == update
+
+    async def test_unknown_version(self) -> None:
+        """Сообщение неизвестной версии не разбирается"""
+        message = envelope.encode(UPDATES[2])
+        message.headers[envelope.SCHEMA_HEADER] = 4
+        with pytest.raises(ValueError, match="schema version 4"):
+            envelope.decode_batch(message)
+
+    async def test_batch_round_trip(self) -> None:
+        """Пачка сохраняет группировку по чатам и порядок"""
+        chats = [UPDATES[:2], UPDATES[2:]]
+        message = envelope.encode_batch(chats)
+        assert message.headers[envelope.SCHEMA_HEADER] == 3
+        assert envelope.decode_batch(message) == chats
+
+    async def test_single_as_batch(self) -> None:
+        """Одиночное сообщение читается как пачка из одного чата"""
+        message = envelope.encode(UPDATES[0])
+        assert envelope.decode_batch(message) == [[UPDATES[0]]]
@@ -0,0 +1,152 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from service.__main__ import app
+from service.config import Storage
+from service.rabbitmq_service.memory import MemoryQueueBackend
+from service.vk_api.dataclasses import ChatInvite
+
+pytestmark = pytest.mark.asyncio
+
+
+async def settle(backend: MemoryQueueBackend) -> None:
+    """Waits for the queue and the retries it is waiting for"""
+    await backend.queue.join()
+    while backend.retrying:
+        await asyncio.gather(*backend.retrying)
+        await backend.queue.join()
+
+
+class TestMemoryQueueBackend:
+    async def test_typed_updates_handed_over(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Обновления доходят до бота теми же объектами, по порядку"""
+        handle = AsyncMock()
+        monkeypatch.setattr(storage.bots_manager, "handle_updates", handle)
+        backend = MemoryQueueBackend(app)
+        updates = [
+            ChatInvite(type="chat_invite_user", peer_id=1, member_id=i)
+            for i in range(3)
+        ]
+        consumer = asyncio.create_task(backend.consume())
+        await backend.publish(updates)
+        await backend.stop_consuming()
+        await asyncio.wait_for(consumer, timeout=1)
+        handled = [call.args[0] for call in handle.await_args_list]
+        assert all(a is b for a, b in zip(handled, updates, strict=True))
+
+    async def test_bounded(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Переполненная очередь заставляет поллер ждать"""
+        monkeypatch.setattr(app.config.rabbit, "memory_queue_size", 1)
+        backend = MemoryQueueBackend(app)
+        update = ChatInvite(type="chat_invite_user", peer_id=1, member_id=1)
+        await backend.publish([update])
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(backend.publish([update]), timeout=0.05)
+
+    async def test_chats_handled_concurrently(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Медленный чат не задерживает другие, порядок в чате сохраняется"""
+        slow_chat = asyncio.Event()
+        handled = []
+
+        async def handle(update):
+            if update.peer_id == 1 and update.member_id == 0:
+                await slow_chat.wait()
+            handled.append((update.peer_id, update.member_id))
+
+        monkeypatch.setattr(storage.bots_manager, "handle_updates", handle)
+        backend = MemoryQueueBackend(app)
+        updates = [
+            ChatInvite(type="chat_invite_user", peer_id=peer_id, member_id=i)
+            for i in range(3)
+            for peer_id in (1, 2)
+        ]
+        consumer = asyncio.create_task(backend.consume())
+        await backend.publish(updates)
+        await asyncio.sleep(0.01)
+        assert handled == [(2, 0), (2, 1), (2, 2)]
+        slow_chat.set()
+        await backend.stop_consuming()
+        await asyncio.wait_for(consumer, timeout=1)
+        assert handled[3:] == [(1, 0), (1, 1), (1, 2)]
+
+    async def test_dead_letters_replayed(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Упавшее обновление сохраняется и возвращается в очередь"""
+        monkeypatch.setattr(app.config.rabbit, "retry_delays", [])
+        handle = AsyncMock(side_effect=[OSError("db is down"), None])
+        monkeypatch.setattr(storage.bots_manager, "handle_updates", handle)
+        backend = MemoryQueueBackend(app)
+        update = ChatInvite(type="chat_invite_user", peer_id=1, member_id=1)
+        consumer = asyncio.create_task(backend.consume())
+        await backend.publish([update])
+        await backend.queue.join()
+        dead = await backend.dead_letters(10)
+        assert dead[0]["body"] == update.to_dict()
+        assert "db is down" in dead[0]["error"]
+        assert await backend.replay_dead_letters() == 1
+        await backend.stop_consuming()
+        await asyncio.wait_for(consumer, timeout=1)
+        assert handle.await_count == 2
+        assert not await backend.dead_letters(10)
+
+    async def test_failed_retried_later(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Упавшее обновление повторяется после задержки"""
+        monkeypatch.setattr(app.config.rabbit, "retry_delays", [0, 0.01])
+        handle = AsyncMock(side_effect=[OSError("db is down")] * 2 + [None])
+        monkeypatch.setattr(storage.bots_manager, "handle_updates", handle)
+        backend = MemoryQueueBackend(app)
+        update = ChatInvite(type="chat_invite_user", peer_id=1, member_id=1)
+        consumer = asyncio.create_task(backend.consume())
+        await backend.publish([update])
+        await settle(backend)
+        await backend.stop_consuming()
+        await asyncio.wait_for(consumer, timeout=1)
+        assert handle.await_count == 3
+        assert not await backend.dead_letters(10)
+
+    async def test_dead_after_last_retry(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """После последней попытки обновление становится мёртвым"""
+        monkeypatch.setattr(app.config.rabbit, "retry_delays", [0, 0])
+        handle = AsyncMock(side_effect=OSError("db is down"))
+        monkeypatch.setattr(storage.bots_manager, "handle_updates", handle)
+        backend = MemoryQueueBackend(app)
+        update = ChatInvite(type="chat_invite_user", peer_id=1, member_id=1)
+        consumer = asyncio.create_task(backend.consume())
+        await backend.publish([update])
+        await settle(backend)
+        await backend.stop_consuming()
+        await asyncio.wait_for(consumer, timeout=1)
+        assert handle.await_count == 3
+        [dead] = await backend.dead_letters(10)
+        assert dead["retries"] == 2
+        assert dead["body"] == update.to_dict()
+
+    async def test_pending_retry_dropped_on_stop(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Остановка не ждёт отложенных повторов"""
+        monkeypatch.setattr(app.config.rabbit, "retry_delays", [60])
+        handle = AsyncMock(side_effect=OSError("db is down"))
+        monkeypatch.setattr(storage.bots_manager, "handle_updates", handle)
+        backend = MemoryQueueBackend(app)
+        update = ChatInvite(type="chat_invite_user", peer_id=1, member_id=1)
+        consumer = asyncio.create_task(backend.consume())
+        await backend.publish([update])
+        await backend.queue.join()
+        assert len(backend.retrying) == 1
+        await backend.stop_consuming()
+        await asyncio.wait_for(consumer, timeout=1)
+        await asyncio.sleep(0)
+        assert not backend.retrying
+        assert handle.await_count == 1
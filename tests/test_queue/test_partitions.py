@@ -0,0 +1,89 @@
+from collections import Counter
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from service.__main__ import app
+from service.rabbitmq_service.partitions import (
+    jump_hash,
+    partition_of,
+    queue_name,
+)
+from service.rabbitmq_service.rabbit import RabbitQueueBackend
+from service.vk_api.dataclasses import ChatInvite
+
+pytestmark = pytest.mark.asyncio
+
+CHAT_PEER_ID = 2_000_000_000
+
+
+def invite(peer_id: int, member_id: int = 1, group_id: int = 2) -> ChatInvite:
+    return ChatInvite(
+        type="chat_invite_user",
+        peer_id=peer_id,
+        member_id=member_id,
+        group_id=group_id,
+    )
+
+
+class TestPartitions:
+    async def test_same_chat_same_partition(self) -> None:
+        """Обновления одного чата всегда попадают в одну партицию"""
+        partitions = {
+            partition_of(invite(CHAT_PEER_ID + 7, member_id=i), 8)
+            for i in range(20)
+        }
+        assert len(partitions) == 1
+
+    async def test_even_spread(self) -> None:
+        """Чаты распределяются по партициям равномерно"""
+        counts = Counter(
+            partition_of(invite(CHAT_PEER_ID + i), 8) for i in range(10000)
+        )
+        assert set(counts) == set(range(8))
+        assert min(counts.values()) > 1000
+
+    async def test_few_keys_move(self) -> None:
+        """При добавлении партиции переезжает малая доля чатов"""
+        keys = range(CHAT_PEER_ID, CHAT_PEER_ID + 10000)
+        moved = sum(jump_hash(key, 8) != jump_hash(key, 9) for key in keys)
+        assert moved < 10000 * 0.15
+
+    async def test_queue_name(self) -> None:
+        """С одной партицией остаётся прежнее имя очереди"""
+        assert queue_name("task_queue", 0, 1) == "task_queue"
+        assert queue_name("task_queue", 3, 4) == "task_queue.3"
+
+    async def test_publish_routing(self, monkeypatch) -> None:
+        """Сообщение публикуется в очередь партиции своего чата"""
+        monkeypatch.setattr(app.config.rabbit, "partitions", 4)
+        routed = []
+
+        async def publish(message, routing_key):
+            routed.append(routing_key)
+
+        backend = RabbitQueueBackend(app)
+        backend.publish_channel = Mock(is_closed=False)
+        backend.publish_channel.default_exchange.publish = publish
+        bunch = [invite(CHAT_PEER_ID + i) for i in range(10)]
+        await backend.publish(bunch)
+        title = app.config.rabbit.queue_title
+        assert routed == [f"{title}.{partition_of(item, 4)}" for item in bunch]
+
+    async def test_single_active_consumer(self, monkeypatch) -> None:
+        """Партицию одновременно читает только одна реплика"""
+        monkeypatch.setattr(app.config.rabbit, "partitions", 4)
+        backend = RabbitQueueBackend(app)
+        channel = Mock(declare_queue=AsyncMock(), declare_exchange=AsyncMock())
+        await backend.declare_topology(channel)
+        declared = {
+            call.args[0]: call.kwargs.get("arguments")
+            for call in channel.declare_queue.await_args_list
+        }
+        for name in backend.queue_names:
+            assert declared[name] == {"x-single-active-consumer": True}
+
+    async def test_single_queue_arguments_kept(self, monkeypatch) -> None:
+        """Единственная очередь объявляется с прежними аргументами"""
+        monkeypatch.setattr(app.config.rabbit, "partitions", 1)
+        assert RabbitQueueBackend(app).queue_arguments is None
@@ -0,0 +1,201 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from service import codec
+from service.__main__ import app
+from service.rabbitmq_service import envelope
+from service.rabbitmq_service.rabbit import AckBatcher, RabbitQueueBackend
+from service.vk_api.dataclasses import ChatInvite
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestRabbitQueueBackend:
+    async def test_publish_pipelined(self) -> None:
+        """Сообщения пачки отправляются не дожидаясь подтверждений"""
+        in_flight = []
+        confirmed = asyncio.Event()
+
+        async def publish(message, routing_key):
+            in_flight.append(message)
+            await confirmed.wait()
+
+        backend = RabbitQueueBackend(app)
+        backend.publish_channel = Mock(is_closed=False)
+        backend.publish_channel.default_exchange.publish = publish
+        bunch = [
+            ChatInvite(type="chat_invite_user", peer_id=1, member_id=i)
+            for i in range(3)
+        ]
+        task = asyncio.create_task(backend.publish(bunch))
+        await asyncio.sleep(0.01)
+        assert len(in_flight) == 3
+        assert not task.done()
+        confirmed.set()
+        await task
+
+
+def incoming(delivery_tag: int) -> Mock:
+    return Mock(delivery_tag=delivery_tag, ack=AsyncMock(), nack=AsyncMock())
+
+
+class TestAckBatcher:
+    async def test_run_acked_at_once(self) -> None:
+        """Подряд обработанные сообщения подтверждаются одним ack"""
+        acks = AckBatcher(app.config.logger)
+        messages = [incoming(tag) for tag in range(1, 4)]
+
+        async def slow_ack(**kwargs) -> None:
+            await asyncio.sleep(0)
+
+        messages[0].ack.side_effect = slow_ack
+        for message in messages:
+            acks.delivered(message)
+        await asyncio.gather(
+            *(acks.done(message, ok=True) for message in messages)
+        )
+        messages[0].ack.assert_awaited_once_with(multiple=True)
+        messages[1].ack.assert_not_awaited()
+        messages[2].ack.assert_awaited_once_with(multiple=True)
+
+    async def test_finished_not_held(self) -> None:
+        """Готовое сообщение не ждёт подтверждения более ранних"""
+        acks = AckBatcher(app.config.logger)
+        messages = [incoming(tag) for tag in range(1, 4)]
+        for message in messages:
+            acks.delivered(message)
+        await acks.done(messages[2], ok=True)
+        messages[2].ack.assert_awaited_once_with()
+        await acks.done(messages[1], ok=True)
+        messages[1].ack.assert_awaited_once_with()
+        messages[0].ack.assert_not_awaited()
+        await acks.done(messages[0], ok=True)
+        messages[0].ack.assert_awaited_once_with(multiple=True)
+        assert not acks.pending and not acks.acked
+
+    async def test_failed_nacked_alone(self) -> None:
+        """Неперенаправленное сообщение возвращается в очередь отдельно"""
+        acks = AckBatcher(app.config.logger)
+        messages = [incoming(tag) for tag in range(1, 4)]
+        for message in messages:
+            acks.delivered(message)
+        await acks.done(messages[1], ok=False)
+        messages[1].nack.assert_awaited_once_with(requeue=True)
+        await acks.done(messages[2], ok=True)
+        messages[2].ack.assert_awaited_once_with()
+        await acks.done(messages[0], ok=True)
+        messages[0].ack.assert_awaited_once_with(multiple=True)
+        messages[1].ack.assert_not_awaited()
+        assert not acks.pending and not acks.acked
+
+
+class TestRetries:
+    @staticmethod
+    def backend(monkeypatch: pytest.MonkeyPatch, handle) -> RabbitQueueBackend:
+        backend = RabbitQueueBackend(app)
+        backend.publish_channel = Mock(is_closed=False)
+        backend.publish_channel.default_exchange.publish = AsyncMock()
+        backend.retry_exchange = Mock(publish=AsyncMock())
+        monkeypatch.setattr(app.storage.bots_manager, "handle_updates", handle)
+        return backend
+
+    @staticmethod
+    def message(body: bytes, headers: dict | None = None) -> Mock:
+        message = incoming(1)
+        message.body = body
+        message.headers = headers or {}
+        message.routing_key = "task_queue"
+        return message
+
+    async def test_failed_goes_to_retry(self, monkeypatch) -> None:
+        """Упавшее обновление уходит на повтор с задержкой, а не теряется"""
+        backend = self.backend(monkeypatch, AsyncMock(side_effect=OSError))
+        update = ChatInvite(type="chat_invite_user", peer_id=1, member_id=1)
+        message = self.message(codec.dumps(update))
+        await backend.process_message(message)
+        published = backend.retry_exchange.publish.await_args
+        assert published.kwargs["routing_key"] == "task_queue"
+        assert published.args[0].headers["retry-count"] == 1
+        assert published.args[0].headers["retry-level"] == "0"
+        message.ack.assert_awaited_once_with(multiple=True)
+
+    async def test_out_of_retries_dead(self, monkeypatch) -> None:
+        """После последнего повтора обновление попадает в очередь мёртвых"""
+        backend = self.backend(monkeypatch, AsyncMock(side_effect=OSError))
+        update = ChatInvite(type="chat_invite_user", peer_id=1, member_id=1)
+        message = self.message(
+            codec.dumps(update),
+            {"retry-count": len(backend.retry_delays), "retry-level": "3"},
+        )
+        await backend.process_message(message)
+        backend.retry_exchange.publish.assert_not_awaited()
+        dead = backend.publish_channel.default_exchange.publish.await_args
+        assert dead.kwargs["routing_key"] == backend.dead_queue_name
+        assert dead.args[0].headers["origin-queue"] == "task_queue"
+        assert "OSError" in dead.args[0].headers["error"]
+
+    async def test_undecodable_dead_at_once(self, monkeypatch) -> None:
+        """Нераспознанное сообщение сразу уходит в очередь мёртвых"""
+        handle = AsyncMock()
+        backend = self.backend(monkeypatch, handle)
+        await backend.process_message(self.message(b"not json"))
+        handle.assert_not_awaited()
+        backend.retry_exchange.publish.assert_not_awaited()
+        dead = backend.publish_channel.default_exchange.publish.await_args
+        assert dead.kwargs["routing_key"] == backend.dead_queue_name
+
+
+def invite(peer_id: int, member_id: int) -> ChatInvite:
+    return ChatInvite(
+        type="chat_invite_user", peer_id=peer_id, member_id=member_id
+    )
+
+
+class TestBatches:
+    async def test_one_message_per_partition(self, monkeypatch) -> None:
+        """Пачка уходит одним сообщением на партицию, по чатам"""
+        monkeypatch.setattr(app.config.rabbit, "batch", True)
+        monkeypatch.setattr(app.config.rabbit, "partitions", 2)
+        backend = RabbitQueueBackend(app)
+        backend.publish_channel = Mock(is_closed=False)
+        publish = backend.publish_channel.default_exchange.publish = (
+            AsyncMock()
+        )
+        bunch = [invite(peer_id, i) for i in range(3) for peer_id in range(8)]
+        await backend.publish(bunch)
+        chats = [
+            chat
+            for call in publish.await_args_list
+            for chat in envelope.decode_batch(call.args[0])
+        ]
+        assert publish.await_count == 2
+        assert sorted(chats, key=lambda chat: chat[0].peer_id) == [
+            [invite(peer_id, i) for i in range(3)] for peer_id in range(8)
+        ]
+
+    async def test_only_failed_chats_retried(self, monkeypatch) -> None:
+        """Повторяются только обновления упавших чатов, начиная с упавшего"""
+        handled = []
+
+        async def handle(update):
+            if (update.peer_id, update.member_id) == (2, 1):
+                raise OSError
+            handled.append((update.peer_id, update.member_id))
+
+        backend = TestRetries.backend(monkeypatch, handle)
+        chats = [[invite(peer_id, i) for i in range(3)] for peer_id in (1, 2)]
+        message = envelope.encode_batch(chats)
+        incoming_message = incoming(1)
+        incoming_message.body = message.body
+        incoming_message.headers = message.headers
+        incoming_message.content_type = message.content_type
+        incoming_message.content_encoding = message.content_encoding
+        incoming_message.routing_key = "task_queue"
+        await backend.process_message(incoming_message)
+        assert handled == [(1, 0), (1, 1), (1, 2), (2, 0)]
+        retried = backend.retry_exchange.publish.await_args.args[0]
+        assert envelope.decode_batch(retried) == [chats[1][1:]]
+        assert retried.headers["retry-count"] == 1
+        incoming_message.ack.assert_awaited_once_with(multiple=True)
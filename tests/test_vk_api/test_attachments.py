@@ -0,0 +1,103 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from service import codec
+from service.config import Storage
+from service.vk_api.metrics import ApiMetrics
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def upload(storage: Storage, monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    monkeypatch.setattr(storage.attachments, "attachments", {})
+    monkeypatch.setattr(
+        storage.game, "get_question_attachment", AsyncMock(return_value=None)
+    )
+    monkeypatch.setattr(storage.game, "save_question_attachment", AsyncMock())
+    upload = AsyncMock(return_value="photo-1_2")
+    monkeypatch.setattr(storage.vk_api, "upload_message_photo", upload)
+    return upload
+
+
+class TestPhotoAttachments:
+    async def test_uploaded_once(
+        self, storage: Storage, upload: AsyncMock
+    ) -> None:
+        """Картинка вопроса загружается один раз, дальше id из памяти"""
+        attachments = storage.attachments
+        results = await asyncio.gather(
+            *(attachments.get(5, "photo:cat.jpg", 10) for _ in range(3))
+        )
+        assert await attachments.get(5, "photo:cat.jpg", 10) == "photo-1_2"
+        assert results == ["photo-1_2"] * 3
+        assert upload.await_count == 1
+        storage.game.save_question_attachment.assert_awaited_once_with(
+            5, storage.vk_api.group_id, "photo-1_2"
+        )
+
+    async def test_attachment_id_as_is(
+        self, storage: Storage, upload: AsyncMock
+    ) -> None:
+        """Вопрос с готовым id вложения не загружается"""
+        attachment = await storage.attachments.get(
+            5, "photo-228193008_457239018", 10
+        )
+        assert attachment == "photo-228193008_457239018"
+        upload.assert_not_awaited()
+
+    async def test_cancelled_caller_not_blocking(
+        self, storage: Storage, upload: AsyncMock
+    ) -> None:
+        """Отмена первого запросившего не оставляет остальных ждать"""
+        uploaded = asyncio.Event()
+
+        async def slow_upload(*args) -> str:
+            await uploaded.wait()
+            return "photo-1_2"
+
+        upload.side_effect = slow_upload
+        attachments = storage.attachments
+        first = asyncio.create_task(attachments.get(6, "photo:cat.jpg", 10))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(attachments.get(6, "photo:cat.jpg", 10))
+        await asyncio.sleep(0)
+        first.cancel()
+        uploaded.set()
+        assert await asyncio.wait_for(second, timeout=1) == "photo-1_2"
+        assert not attachments.in_flight
+
+    async def test_upload_timed(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch, tmp_path
+    ) -> None:
+        """Загрузка картинки попадает в метрики задержек"""
+        vk_api = storage.vk_api
+        call = AsyncMock(
+            side_effect=[
+                {"response": {"upload_url": "https://upload.vk.test/"}},
+                {"response": [{"owner_id": -1, "id": 2}]},
+            ]
+        )
+        monkeypatch.setattr(vk_api, "_call", call)
+        monkeypatch.setattr(vk_api, "metrics", ApiMetrics())
+        answer = {"photo": "[]", "server": 1, "hash": "h"}
+        session = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200, content=codec.dumps(answer)
+                )
+            )
+        )
+        monkeypatch.setattr(vk_api, "session", session)
+        path = tmp_path / "cat.jpg"
+        path.write_bytes(b"jpeg")
+        try:
+            attachment = await vk_api.upload_message_photo(path, 10)
+        finally:
+            await session.aclose()
+        assert attachment == "photo-1_2"
+        assert vk_api.metrics.requests["photos.upload"].count == 1
+        assert vk_api.metrics.http_status["photos.upload", 200] == 1
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from service.vk_api.batcher import ExecuteBatcher
+from service.vk_api.dataclasses import Message
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestExecuteBatcher:
+    async def test_calls_coalesced_into_execute(self) -> None:
+        """Несколько вызовов в одном окне уходят одним execute"""
+        requests = []
+
+        async def request(method: str, params: dict, priority) -> dict:
+            requests.append((method, params))
+            return {
+                "response": [1, False],
+                "execute_errors": [{"error_code": 10}],
+            }
+
+        batcher = ExecuteBatcher(request, window=0.01)
+        first, second = await asyncio.gather(
+            batcher.call("messages.send", {"peer_id": 1}),
+            batcher.call("users.get", {"user_ids": 2}),
+        )
+        assert len(requests) == 1
+        method, params = requests[0]
+        assert method == "execute"
+        assert "API.messages.send(" in params["code"]
+        assert first == {"response": 1}
+        assert second == {"error": {"error_code": 10}}
+
+    async def test_single_call_not_wrapped(self) -> None:
+        """Одиночный вызов отправляется как есть"""
+
+        async def request(method: str, params: dict, priority) -> dict:
+            return {"response": method}
+
+        batcher = ExecuteBatcher(request, window=0.01)
+        result = await batcher.call("users.get", {"user_ids": 2})
+        assert result == {"response": "users.get"}
+
+    async def test_flush_on_max_calls(self) -> None:
+        """При заполнении пакета он отправляется не дожидаясь окна"""
+        sizes = []
+
+        async def request(method: str, params: dict, priority) -> dict:
+            size = params["code"].count("API.")
+            sizes.append(size)
+            return {"response": [1] * size}
+
+        batcher = ExecuteBatcher(request, window=10, max_calls=3)
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                *(batcher.call("messages.send", {}) for _ in range(3))
+            ),
+            timeout=1,
+        )
+        assert sizes == [3]
+        assert results == [{"response": 1}] * 3
+
+    async def test_none_params_left_out(
+        self, vk_api, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Сообщение без вложения уходит в execute без attachment"""
+        codes = []
+
+        async def request(method: str, params: dict, priority) -> dict:
+            codes.append(params["code"])
+            return {"response": [1, 2]}
+
+        monkeypatch.setattr(
+            vk_api.group(), "batcher", ExecuteBatcher(request, window=0.01)
+        )
+        sent = await asyncio.gather(
+            *(
+                vk_api.send_message(Message(user_id=1, text="", peer_id=i))
+                for i in (1, 2)
+            )
+        )
+        assert sent == [True, True]
+        [code] = codes
+        assert code.count("API.messages.send(") == 2
+        assert "attachment" not in code
+        assert "null" not in code
@@ -0,0 +1,102 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from service.__main__ import app
+from service.vk_api.dataclasses import Update
+
+
+@pytest.fixture(name="callback_cli")
+def fixture_callback_client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(app.config.vk_api, "ingestion", "callback")
+    monkeypatch.setattr(app.config.vk_api, "callback_confirmation", "abc")
+    monkeypatch.setattr(app.config.vk_api, "callback_secret", "secret")
+    return TestClient(app)
+
+
+class TestCallbackHandler:
+    def test_confirmation(self, callback_cli: TestClient) -> None:
+        """Ручка /vk.callback отвечает строкой подтверждения"""
+        response = callback_cli.post(
+            "/v1/vk.callback",
+            json={
+                "type": "confirmation",
+                "group_id": app.config.bot.group_id,
+                "secret": "secret",
+            },
+        )
+        assert response.status_code == 200
+        assert response.text == "abc"
+
+    def test_wrong_secret(self, callback_cli: TestClient) -> None:
+        """Запрос с неверным секретом отклоняется"""
+        response = callback_cli.post(
+            "/v1/vk.callback",
+            json={
+                "type": "message_new",
+                "group_id": app.config.bot.group_id,
+                "secret": "wrong",
+            },
+        )
+        assert response.status_code == 403
+
+    def test_update_queued(
+        self, callback_cli: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Обновление с верным секретом уходит в очередь"""
+        send_to_que = AsyncMock()
+        monkeypatch.setattr(app.storage.que, "send_to_que", send_to_que)
+        response = callback_cli.post(
+            "/v1/vk.callback",
+            json={
+                "type": "message_new",
+                "group_id": app.config.bot.group_id,
+                "secret": "secret",
+                "object": {
+                    "message": {
+                        "id": 0,
+                        "from_id": 1,
+                        "peer_id": 10,
+                        "text": "/start",
+                        "payload": "",
+                    }
+                },
+            },
+        )
+        assert response.status_code == 200
+        [update] = send_to_que.await_args.kwargs["bunch"]
+        assert isinstance(update, Update)
+        assert update.object.message.text == "/start"
+        assert update.group_id == app.config.bot.group_id
+
+    def test_bad_body(self, callback_cli: TestClient) -> None:
+        """Тело не из json отклоняется как неверный запрос"""
+        response = callback_cli.post("/v1/vk.callback", content=b"{not json")
+        assert response.status_code == 400
+        response = callback_cli.post("/v1/vk.callback", json=[1, 2])
+        assert response.status_code == 400
+
+    def test_ingestion_off(
+        self, callback_cli: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Без приёма через callback ручка не найдена"""
+        monkeypatch.setattr(app.config.vk_api, "ingestion", "long_poll")
+        response = callback_cli.post(
+            "/v1/vk.callback",
+            json={
+                "type": "confirmation",
+                "group_id": app.config.bot.group_id,
+                "secret": "secret",
+            },
+        )
+        assert response.status_code == 404
+
+    async def test_secret_required(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Приём через callback не запускается без секрета"""
+        monkeypatch.setattr(app.config.vk_api, "ingestion", "both")
+        monkeypatch.setattr(app.config.vk_api, "callback_secret", "")
+        with pytest.raises(ValueError, match="callback_secret"):
+            await app.storage.vk_api.connect()
@@ -0,0 +1,106 @@
+from unittest.mock import AsyncMock, Mock
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from service.config import GroupConfig, Storage
+from service.vk_api.accessor import API_VERSION, LONG_POLL_WAIT
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestHttpClients:
+    async def test_api_timeout(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Клиент api ждёт ответа не дольше read_timeout"""
+        vk_api = storage.vk_api
+        monkeypatch.setattr(vk_api.config, "read_timeout", 7.0)
+        monkeypatch.setattr(vk_api.config, "connect_timeout", 2.0)
+        client = vk_api._make_api_client()
+        try:
+            assert client.timeout.read == 7.0
+            assert client.timeout.write == 7.0
+            assert client.timeout.connect == 2.0
+        finally:
+            await client.aclose()
+
+    async def test_long_poll_timeout(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Клиент long-poll ждёт ответа дольше ожидания сервера"""
+        vk_api = storage.vk_api
+        monkeypatch.setattr(vk_api.config, "read_timeout", 7.0)
+        monkeypatch.setattr(vk_api.config, "connect_timeout", 2.0)
+        client = vk_api._make_long_poll_client()
+        try:
+            assert client.timeout.read == LONG_POLL_WAIT + 7.0
+            assert client.timeout.connect == 2.0
+        finally:
+            await client.aclose()
+
+    async def test_request_is_form_post(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Запрос к api уходит POST-формой, токен не попадает в url"""
+        vk_api = storage.vk_api
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"response": 1})
+
+        session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(vk_api, "session", session)
+        group = vk_api.group()
+        token = "vk1.a.secret"
+        monkeypatch.setattr(
+            group,
+            "tokens",
+            vk_api._make_token_pool(GroupConfig(token, group.group_id)),
+        )
+        try:
+            answer = await vk_api._request(
+                "users.get", {"user_ids": "1,2", "fields": None}
+            )
+        finally:
+            await session.aclose()
+
+        assert answer == {"response": 1}
+        [request] = requests
+        assert request.method == "POST"
+        assert str(request.url) == vk_api.config.api_path + "users.get"
+        assert token not in str(request.url)
+        body = parse_qs(request.content.decode())
+        assert body["v"] == [API_VERSION]
+        assert body["access_token"] == [token]
+        assert body["user_ids"] == ["1,2"]
+        assert "fields" not in body
+
+    async def test_disconnect_order(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Клиенты закрываются после остановки поллеров и воркера"""
+        vk_api = storage.vk_api
+        order = []
+
+        def step(name: str) -> AsyncMock:
+            return AsyncMock(side_effect=lambda: order.append(name))
+
+        group = vk_api.group()
+        monkeypatch.setattr(group, "poller", Mock(stop=step("poller")))
+        monkeypatch.setattr(group, "batcher", Mock(close=step("batcher")))
+        monkeypatch.setattr(vk_api, "worker", Mock(stop=step("worker")))
+        monkeypatch.setattr(vk_api, "session", Mock(aclose=step("session")))
+        monkeypatch.setattr(
+            vk_api, "poll_session", Mock(aclose=step("poll_session"))
+        )
+        await vk_api.disconnect()
+        assert order == [
+            "poller",
+            "worker",
+            "batcher",
+            "session",
+            "poll_session",
+        ]
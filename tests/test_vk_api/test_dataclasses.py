@@ -0,0 +1,39 @@
+from service import codec
+from service.vk_api.dataclasses import ChatInvite, Update, parse_update
+
+MESSAGE_EVENT = {
+    "type": "message_event",
+    "object": {
+        "user_id": 1,
+        "peer_id": 2000000001,
+        "event_id": "e1",
+        "payload": {"btn": "ready"},
+    },
+}
+CHAT_INVITE = {
+    "type": "message_new",
+    "object": {
+        "message": {
+            "id": 0,
+            "from_id": 1,
+            "peer_id": 2000000001,
+            "text": "",
+            "action": {"type": "chat_invite_user", "member_id": -2},
+        }
+    },
+}
+
+
+class TestUpdateModel:
+    def test_queue_round_trip(self) -> None:
+        """Событие из long-poll проходит через очередь без потерь"""
+        update = Update.from_vk(MESSAGE_EVENT, group_id=2)
+        restored = parse_update(codec.loads(codec.dumps(update)))
+        assert restored == update
+        assert restored.object.message.from_id == 1
+
+    def test_chat_invite(self) -> None:
+        """Приглашение в беседу восстанавливается как ChatInvite"""
+        invite = ChatInvite.from_vk(CHAT_INVITE, group_id=2)
+        assert invite.member_id == -2
+        assert parse_update(codec.loads(codec.dumps(invite))) == invite
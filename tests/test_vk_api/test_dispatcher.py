@@ -0,0 +1,72 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from service.config import Storage
+from service.vk_api.dataclasses import Message
+from service.vk_api.exceptions import VkApiError
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestMessageDispatcher:
+    async def test_peer_order_kept(
+        self, storage: Storage, vk_api_send_message_mock: AsyncMock
+    ) -> None:
+        """Сообщения одному peer_id доставляются по порядку"""
+        sent = []
+
+        async def send_message(message: Message, **kwargs) -> bool:
+            await asyncio.sleep(0.001 * (message.user_id % 3))
+            sent.append((message.peer_id, message.user_id))
+            return True
+
+        vk_api_send_message_mock.side_effect = send_message
+        dispatcher = storage.dispatcher
+        dispatcher.start()
+        for i in range(10):
+            for peer_id in (1, 2):
+                await dispatcher.send_message(
+                    Message(user_id=i, text="", peer_id=peer_id)
+                )
+        await dispatcher.stop()
+
+        for peer_id in (1, 2):
+            assert [i for peer, i in sent if peer == peer_id] == list(
+                range(10)
+            )
+        stats = dispatcher.stats()
+        assert stats.sent == 20
+        assert stats.queue_depth == 0
+
+    async def test_failed_counted(
+        self, storage: Storage, vk_api_send_message_mock: AsyncMock
+    ) -> None:
+        """Неотправленные сообщения считаются в failed"""
+        vk_api_send_message_mock.side_effect = [True, False, True]
+        dispatcher = storage.dispatcher
+        sent, failed = dispatcher.sent, dispatcher.failed
+        dispatcher.start()
+        for i in range(3):
+            await dispatcher.send_message(
+                Message(user_id=i, text="", peer_id=1)
+            )
+        await dispatcher.stop()
+
+        stats = dispatcher.stats()
+        assert stats.sent - sent == 2
+        assert stats.failed - failed == 1
+
+    async def test_vk_error_reported(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Ошибка vk при отправке возвращается как неудача"""
+        vk_api = storage.vk_api
+        call = AsyncMock(side_effect=VkApiError("messages.send"))
+        monkeypatch.setattr(vk_api, "_call", call)
+        message = Message(user_id=1, text="", peer_id=1)
+        assert await vk_api.send_message(message) is False
+        call.side_effect = None
+        call.return_value = {"response": 1}
+        assert await vk_api.send_message(message) is True
@@ -0,0 +1,86 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from service.vk_api import circuit_breaker
+from service.vk_api.circuit_breaker import CircuitBreaker, CircuitState
+from service.vk_api.exceptions import CircuitOpenError, VkApiError
+
+pytestmark = pytest.mark.asyncio
+
+TOO_MANY_REQUESTS = {"error": {"error_code": 6, "error_msg": "Too many"}}
+ACCESS_DENIED = {"error": {"error_code": 15, "error_msg": "Access denied"}}
+
+
+class TestVkApiErrors:
+    async def test_retryable_error_retried(
+        self, vk_api, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Ошибка 6 повторяется и затем возвращается ответ"""
+        request = AsyncMock(side_effect=[TOO_MANY_REQUESTS, {"response": 1}])
+        monkeypatch.setattr(vk_api, "_request", request)
+        assert await vk_api._call("messages.send", {}) == {"response": 1}
+        assert request.await_count == 2
+
+    async def test_not_retryable_error_raised(
+        self, vk_api, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Ошибка доступа не повторяется"""
+        request = AsyncMock(return_value=ACCESS_DENIED)
+        monkeypatch.setattr(vk_api, "_request", request)
+        with pytest.raises(VkApiError):
+            await vk_api._call("messages.send", {})
+        assert request.await_count == 1
+
+    async def test_breaker_fails_fast(
+        self, vk_api, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Открытый предохранитель не пускает запросы к методу"""
+        monkeypatch.setattr(vk_api.config, "breaker_failures", 2)
+        request = AsyncMock(return_value=TOO_MANY_REQUESTS)
+        monkeypatch.setattr(vk_api, "_request", request)
+        with pytest.raises(VkApiError):
+            await vk_api._call("users.get", {})
+        assert request.await_count == 2
+        with pytest.raises(CircuitOpenError):
+            await vk_api._call("users.get", {})
+        assert request.await_count == 2
+
+    async def test_stale_trial_replaced(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Пробный вызов без исхода не блокирует метод навсегда"""
+        now = 100.0
+        monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now)
+        breaker = CircuitBreaker("users.get", 1, reset_timeout=30)
+        breaker.record_failure()
+        now += 30
+        breaker.before_call()
+        assert breaker.state == CircuitState.half_open
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        now += 30
+        breaker.before_call()
+        assert breaker.state == CircuitState.half_open
+
+    async def test_cancelled_trial_reopens(
+        self, vk_api, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Отменённый пробный вызов считается неудачным"""
+        breaker = vk_api.get_breaker("users.get")
+        breaker.state = CircuitState.open
+        breaker.opened_at = -breaker.reset_timeout
+        never = asyncio.Event()
+
+        async def request(*args, **kwargs):
+            await never.wait()
+
+        monkeypatch.setattr(vk_api, "_request", request)
+        task = asyncio.create_task(vk_api._call("users.get", {}))
+        await asyncio.sleep(0.01)
+        assert breaker.state == CircuitState.half_open
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert breaker.state == CircuitState.open
@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+import pytest
+
+from service.vk_api.batcher import ExecuteBatcher
+from service.vk_api.fake_server import (
+    CHAT_PEER_ID,
+    FakeVk,
+    FakeVkConfig,
+    make_app,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def fake() -> FakeVk:
+    return FakeVk(FakeVkConfig(users_per_chat=3))
+
+
+@pytest.fixture
+def vk_api(vk_api, fake: FakeVk, monkeypatch: pytest.MonkeyPatch):
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(make_app(fake)))
+    monkeypatch.setattr(vk_api.config, "api_path", "http://fake/method/")
+    monkeypatch.setattr(vk_api, "session", client)
+    vk_api.members_cache.cache.clear()
+    return vk_api
+
+
+class TestFakeServer:
+    async def test_accessor_calls(self, vk_api, fake: FakeVk) -> None:
+        """Аксессор работает с заглушкой вместо api.vk.com"""
+        members = await vk_api.get_conversation_members(CHAT_PEER_ID + 1)
+        assert [member.vk_id for member in members] == [4, 5, 6]
+        users = await vk_api.get_users_info([7])
+        assert users[0].second_name == "User7"
+        assert fake.calls["messages.getConversationMembers"] == 1
+
+    async def test_execute_batch(self, vk_api, fake: FakeVk) -> None:
+        """Пачка вызовов через execute раскладывается по методам"""
+        batcher = ExecuteBatcher(vk_api._request, window=0.01)
+        bodies = await asyncio.gather(
+            batcher.call("users.get", {"user_ids": "1"}),
+            batcher.call("messages.send", {"peer_id": 1, "message": "a"}),
+            batcher.call("wrong.method", {}),
+        )
+        assert fake.calls["execute"] == 1
+        assert bodies[0]["response"][0]["id"] == 1
+        assert "response" in bodies[1]
+        assert bodies[2]["error"]["error_code"] == 3
+
+    async def test_long_poll(self, fake: FakeVk) -> None:
+        """Сценарные события отдаются через a_check"""
+        await fake.publish(fake.message_new(CHAT_PEER_ID + 1, 4, "/start"))
+        data = await fake.a_check(ts=1, wait=0)
+        assert data["ts"] == "2"
+        assert data["updates"][0]["object"]["message"]["text"] == "/start"
+        assert (await fake.a_check(ts=2, wait=0))["updates"] == []
@@ -0,0 +1,91 @@
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from service.config import Storage
+from service.vk_api.accessor import VkApiAccessor
+from service.vk_api.groups import GroupSession, current_group_id
+from service.vk_api.rate_limiter import RateLimiter
+from service.vk_api.token_pool import PooledToken, TokenPool
+
+pytestmark = pytest.mark.asyncio
+
+
+def message_update(peer_id: int) -> dict:
+    return {
+        "type": "message_new",
+        "object": {
+            "message": {
+                "id": 0,
+                "from_id": 1,
+                "peer_id": peer_id,
+                "text": "/start",
+                "payload": "",
+            }
+        },
+    }
+
+
+@pytest.fixture
+def vk_api(storage: Storage, monkeypatch: pytest.MonkeyPatch):
+    vk_api = storage.vk_api
+    monkeypatch.setitem(
+        vk_api.groups,
+        7,
+        GroupSession(
+            group_id=7,
+            tokens=TokenPool([PooledToken("7", RateLimiter(0, 1))], 60),
+        ),
+    )
+    return vk_api
+
+
+class TestGroups:
+    async def test_updates_tagged_with_group(
+        self, vk_api: VkApiAccessor
+    ) -> None:
+        """Обновления помечаются сообществом, из которого пришли"""
+        updates = await vk_api.form_updates_lst(
+            {"updates": [message_update(10)]}, group_id=7
+        )
+        assert [update.group_id for update in updates] == [7]
+
+    async def test_group_from_context(self, vk_api: VkApiAccessor) -> None:
+        """Ответ уходит с токеном сообщества обрабатываемого обновления"""
+        assert vk_api.group().group_id == vk_api.group_id
+        token = current_group_id.set(7)
+        try:
+            assert vk_api.group().tokens.pick().token == "7"
+        finally:
+            current_group_id.reset(token)
+
+    async def test_games_kept_per_group(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Игры чатов с одним peer_id в разных сообществах не смешиваются"""
+        queries = []
+
+        async def get_db_result(query):
+            queries.append(query.compile(dialect=postgresql.dialect()))
+            result = Mock(rowcount=0, all=Mock(return_value=[]))
+            result.scalars.return_value.first.return_value = None
+            return result
+
+        game = storage.game
+        monkeypatch.setattr(game, "get_db_result", get_db_result)
+        await game.chat_has_running_game(2000000001)
+        token = current_group_id.set(7)
+        try:
+            await game.chat_has_running_game(2000000001)
+            await game.finish_game(chat_id=2000000001)
+        finally:
+            current_group_id.reset(token)
+        await game.get_statistic_sum_score(2000000001, group_id=7)
+        group_ids = [
+            value
+            for query in queries
+            for key, value in query.params.items()
+            if key.startswith("group_id")
+        ]
+        assert group_ids == [storage.vk_api.group_id, 7, 7, 7]
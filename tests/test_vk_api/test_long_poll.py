@@ -0,0 +1,86 @@
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+
+from service import codec
+from service.config import Storage
+
+pytestmark = pytest.mark.asyncio
+
+UPDATE = {
+    "type": "message_new",
+    "object": {
+        "message": {
+            "id": 0,
+            "from_id": 1,
+            "peer_id": 10,
+            "text": "/start",
+            "payload": "",
+        }
+    },
+}
+
+
+@pytest.fixture
+def long_poll(storage: Storage, monkeypatch: pytest.MonkeyPatch):
+    long_poll = Mock(get_ts=AsyncMock(return_value="40"), save_ts=AsyncMock())
+    monkeypatch.setattr(storage, "long_poll", long_poll)
+    monkeypatch.setattr(storage.que, "send_to_que", AsyncMock())
+    group = storage.vk_api.group()
+    monkeypatch.setattr(group, "server", "https://lp.vk.test")
+    monkeypatch.setattr(group, "ts", "35")
+    return long_poll
+
+
+def poll_answer(body: dict) -> Mock:
+    client = Mock(spec=httpx.AsyncClient)
+    client.get = AsyncMock(
+        return_value=httpx.Response(200, content=codec.dumps(body))
+    )
+    return client
+
+
+class TestLongPollCheckpoint:
+    async def test_resume_from_checkpoint(
+        self, storage: Storage, long_poll: Mock
+    ) -> None:
+        """После перезапуска опрос продолжается с сохранённого ts"""
+        group = storage.vk_api.group()
+        await storage.vk_api._resume_long_poll(group)
+        assert group.ts == "40"
+
+    async def test_checkpoint_after_queue(
+        self,
+        storage: Storage,
+        long_poll: Mock,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """ts сохраняется после того, как события попали в очередь"""
+        vk_api = storage.vk_api
+        monkeypatch.setattr(
+            vk_api,
+            "poll_session",
+            poll_answer({"ts": "41", "updates": [UPDATE]}),
+        )
+        await vk_api.poll(vk_api.group_id)
+        storage.que.send_to_que.assert_awaited_once()
+        long_poll.save_ts.assert_awaited_once_with(vk_api.group_id, "41")
+
+    async def test_no_checkpoint_when_queue_fails(
+        self,
+        storage: Storage,
+        long_poll: Mock,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Если очередь недоступна, ts не двигается и события придут снова"""
+        vk_api = storage.vk_api
+        monkeypatch.setattr(
+            vk_api,
+            "poll_session",
+            poll_answer({"ts": "41", "updates": [UPDATE]}),
+        )
+        storage.que.send_to_que.side_effect = ConnectionError
+        await vk_api.poll(vk_api.group_id)
+        assert vk_api.group().ts == "35"
+        long_poll.save_ts.assert_not_awaited()
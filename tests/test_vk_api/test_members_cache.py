@@ -0,0 +1,81 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from service.config import Storage
+from service.dataclasses import UserDto
+from service.vk_api.dataclasses import ChatInvite
+
+pytestmark = pytest.mark.asyncio
+
+
+def kick_update(peer_id: int, member_id: int) -> dict:
+    return {
+        "type": "message_new",
+        "object": {
+            "message": {
+                "id": 0,
+                "from_id": member_id,
+                "peer_id": peer_id,
+                "text": "",
+                "action": {"type": "chat_kick_user", "member_id": member_id},
+            }
+        },
+    }
+
+
+class TestConversationMembersCache:
+    async def test_kick_removes_member(self, storage: Storage) -> None:
+        """Событие chat_kick_user убирает участника из кэша беседы"""
+        vk_api = storage.vk_api
+        vk_api.members_cache.set(
+            vk_api.group_id,
+            10,
+            [
+                UserDto(vk_id=1, first_name="a", second_name="b"),
+                UserDto(vk_id=2, first_name="c", second_name="d"),
+            ],
+        )
+        [kick] = await vk_api.form_updates_lst(
+            {"updates": [kick_update(10, 2)]}
+        )
+        assert kick == ChatInvite(
+            type="chat_kick_user",
+            peer_id=10,
+            member_id=2,
+            group_id=vk_api.group_id,
+        )
+        # the poller only queues the kick, the cache is updated where
+        # updates are handled
+        members = await vk_api.get_conversation_members(10)
+        assert [member.vk_id for member in members] == [1, 2]
+        await storage.bots_manager.handle_updates(kick)
+        members = await vk_api.get_conversation_members(10)
+        assert [member.vk_id for member in members] == [1]
+
+    async def test_invite_adds_member(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Приглашённый участник добавляется в кэш при обработке"""
+        vk_api = storage.vk_api
+        user = UserDto(vk_id=2, first_name="c", second_name="d")
+        monkeypatch.setattr(
+            storage.user_directory, "get", AsyncMock(return_value=user)
+        )
+        monkeypatch.setattr(
+            storage.bots_manager, "process_chat_invite_event", AsyncMock()
+        )
+        vk_api.members_cache.set(
+            vk_api.group_id,
+            11,
+            [UserDto(vk_id=1, first_name="a", second_name="b")],
+        )
+        invite = ChatInvite(
+            type="chat_invite_user",
+            peer_id=11,
+            member_id=2,
+            group_id=vk_api.group_id,
+        )
+        await storage.bots_manager.handle_updates(invite)
+        members = await vk_api.get_conversation_members(11)
+        assert [member.vk_id for member in members] == [1, 2]
@@ -0,0 +1,44 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from service.__main__ import app
+from service.vk_api.exceptions import VkApiError
+from service.vk_api.fake_server import FakeVk, FakeVkConfig, make_app
+from service.vk_api.metrics import ApiMetrics
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def vk_api(vk_api, monkeypatch: pytest.MonkeyPatch):
+    fake = FakeVk(FakeVkConfig())
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(make_app(fake)))
+    monkeypatch.setattr(vk_api.config, "api_path", "http://fake/method/")
+    monkeypatch.setattr(vk_api, "session", client)
+    monkeypatch.setattr(vk_api, "metrics", ApiMetrics())
+    return vk_api
+
+
+class TestApiMetrics:
+    async def test_latency_and_errors(self, vk_api) -> None:
+        """Время ответа и ошибки считаются по методам"""
+        await vk_api.get_users_info([1])
+        await vk_api.get_user_info(2)
+        with pytest.raises(VkApiError):
+            await vk_api._call("unknown.method", {})
+        metrics = vk_api.metrics
+        assert metrics.calls["users.get"].count == 2
+        assert metrics.requests["users.get"].count == 2
+        assert metrics.http_status["users.get", 200] == 2
+        assert metrics.errors["unknown.method", "3"] == 1
+
+    async def test_metrics_endpoint(self, vk_api) -> None:
+        """Ручка /metrics отдаёт метрики в формате prometheus"""
+        await vk_api.get_users_info([1])
+        response = TestClient(app).get("/metrics")
+        assert response.status_code == 200
+        assert (
+            'vk_api_request_seconds_count{method="users.get"} 1'
+            in response.text
+        )
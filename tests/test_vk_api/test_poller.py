@@ -0,0 +1,74 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from service.__main__ import app
+from service.config import Storage
+from service.vk_api.poller import Poller, PollerHealth
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def poller(storage: Storage, monkeypatch: pytest.MonkeyPatch) -> Poller:
+    vk_api = storage.vk_api
+    group = vk_api.group()
+    monkeypatch.setattr(vk_api.config, "poller_backoff_base", 0.001)
+    monkeypatch.setattr(vk_api.config, "poller_down_after", 3)
+    monkeypatch.setattr(group, "server", "https://lp.vk.test")
+    poller = Poller(app, group.group_id)
+    monkeypatch.setattr(group, "poller", poller)
+    return poller
+
+
+class TestPoller:
+    async def test_backoff_and_health(
+        self, storage: Storage, poller: Poller, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Неудачные опросы повторяются с паузой, здоровье падает до down"""
+        poll = AsyncMock(return_value=False)
+        monkeypatch.setattr(storage.vk_api, "poll", poll)
+        poller.start()
+        await asyncio.sleep(0.05)
+        await poller.stop()
+        assert poller.health == PollerHealth.down
+        assert 3 <= poll.await_count < 100
+
+        response = TestClient(app).get("/v1/vk.health")
+        assert response.status_code == 503
+        assert response.json()["data"]["data"]["groups"][0]["health"] == "down"
+
+    async def test_recovers(
+        self, storage: Storage, poller: Poller, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Успешный опрос возвращает состояние healthy"""
+        results = iter([False, True])
+
+        async def poll(group_id: int) -> bool:
+            result = next(results, None)
+            if result is None:
+                await asyncio.sleep(30)
+            return result
+
+        monkeypatch.setattr(storage.vk_api, "poll", poll)
+        poller.start()
+        await asyncio.sleep(0.05)
+        assert poller.health == PollerHealth.healthy
+        await poller.stop()
+
+    async def test_stop_cancels_poll(
+        self, storage: Storage, poller: Poller, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Остановка не ждёт завершения долгого запроса"""
+
+        async def hanging_poll(group_id: int) -> bool:
+            await asyncio.sleep(30)
+            return True
+
+        monkeypatch.setattr(storage.vk_api, "poll", hanging_poll)
+        poller.start()
+        await asyncio.sleep(0)
+        await asyncio.wait_for(poller.stop(), timeout=1)
+        assert poller.poll_task.cancelled()
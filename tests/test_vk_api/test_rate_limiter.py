@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from service.vk_api.rate_limiter import Priority, RateLimiter
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestRateLimiter:
+    async def test_burst_is_not_delayed(self) -> None:
+        """Запросы в пределах burst проходят сразу"""
+        limiter = RateLimiter(rate=1, burst=3)
+        await asyncio.wait_for(
+            asyncio.gather(*(limiter.acquire() for _ in range(3))),
+            timeout=0.1,
+        )
+
+    async def test_high_priority_served_first(self) -> None:
+        """Ожидающие запросы выпускаются по приоритету"""
+        limiter = RateLimiter(rate=100, burst=1)
+        await limiter.acquire()
+        order = []
+
+        async def acquire(name: str, priority: Priority) -> None:
+            await limiter.acquire(priority)
+            order.append(name)
+
+        await asyncio.gather(
+            acquire("low", Priority.low),
+            acquire("normal", Priority.normal),
+            acquire("high", Priority.high),
+        )
+        assert order == ["high", "normal", "low"]
@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from service.vk_api.circuit_breaker import CircuitState
+from service.vk_api.rate_limiter import RateLimiter
+from service.vk_api.token_pool import PooledToken, TokenPool
+
+pytestmark = pytest.mark.asyncio
+
+FLOOD_CONTROL = {"error": {"error_code": 9, "error_msg": "Flood control"}}
+
+
+def make_pool(*tokens: str, rate: float = 0) -> TokenPool:
+    return TokenPool(
+        [PooledToken(token, RateLimiter(rate, 10)) for token in tokens],
+        suspend_time=60,
+    )
+
+
+class TestTokenPool:
+    async def test_round_robin(self) -> None:
+        """Токены с равным запасом выбираются по очереди"""
+        pool = make_pool("a", "b", "c")
+        assert [pool.pick().token for _ in range(4)] == ["a", "b", "c", "a"]
+
+    async def test_prefers_budget(self) -> None:
+        """Выбирается токен с наибольшим остатком лимита"""
+        pool = make_pool("a", "b", rate=1)
+        for _ in range(5):
+            await pool.tokens[0].rate_limiter.acquire()
+        assert [pool.pick().token for _ in range(2)] == ["b", "b"]
+
+    async def test_suspended_skipped(self) -> None:
+        """Токен после ошибки авторизации или флуда выводится из ротации"""
+        pool = make_pool("a", "b")
+        pool.suspend(pool.tokens[0])
+        assert pool.active == 1
+        assert [pool.pick().token for _ in range(2)] == ["b", "b"]
+
+    async def test_call_switches_token(
+        self, vk_api, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Ошибка токена повторяется сразу с другим токеном"""
+        request = AsyncMock(side_effect=[FLOOD_CONTROL, {"response": 1}])
+        monkeypatch.setattr(vk_api, "_request", request)
+        assert await vk_api._call("messages.send", {}) == {"response": 1}
+        assert request.await_count == 2
+
+    async def test_half_open_trial_switches_token(
+        self, vk_api, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Ошибка токена в пробном вызове не оставляет метод заблокированным"""
+        breaker = vk_api.get_breaker("messages.send")
+        breaker.state = CircuitState.open
+        breaker.opened_at = -breaker.reset_timeout
+        request = AsyncMock(side_effect=[FLOOD_CONTROL, {"response": 1}])
+        monkeypatch.setattr(vk_api, "_request", request)
+        assert await vk_api._call("messages.send", {}) == {"response": 1}
+        assert breaker.state == CircuitState.closed
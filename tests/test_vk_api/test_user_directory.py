@@ -0,0 +1,34 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from service.config import Storage
+from service.dataclasses import UserDto
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestUserDirectory:
+    async def test_misses_resolved_in_bulk(
+        self, storage: Storage, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Одновременные промахи кэша решаются одним users.get"""
+        get_users_info = AsyncMock(
+            side_effect=lambda ids: [
+                UserDto(vk_id=vk_id, first_name="a", second_name="b")
+                for vk_id in ids
+            ]
+        )
+        monkeypatch.setattr(storage.vk_api, "get_users_info", get_users_info)
+        directory = storage.user_directory
+        directory.cache.clear()
+
+        users = await asyncio.gather(
+            directory.get(1), directory.get(2), directory.get(1)
+        )
+        assert [user.vk_id for user in users] == [1, 2, 1]
+        get_users_info.assert_awaited_once_with([1, 2])
+
+        assert (await directory.get(2)).vk_id == 2
+        assert get_users_info.await_count == 1